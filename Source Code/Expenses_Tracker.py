@@ -1,5 +1,6 @@
 import tkinter as tk
 import tkinter.messagebox
+from tkinter import filedialog
 # from tkinter import *
 from tkinter import ttk
 import matplotlib.pyplot as plt
@@ -8,10 +9,21 @@ import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg 
 # to calculate percentage of the pie chart
 from matplotlib.figure import Figure
+# the pie slices are kept and only their angles change
+from matplotlib.patches import Wedge
 #for the file operation
 import os 
+import io
+# to compact the journal and read imports without blocking the window
+import threading
+import queue
+# bank statement import
+import csv
+import re
 # Get the current time and date
-from datetime import datetime
+from datetime import datetime, date as Date
+# metadata of the binary expense store
+import json
 
 class ExpenseBase:
     #this class hold the variable getter and setter 
@@ -19,6 +31,7 @@ class ExpenseBase:
         self._entry_no = 1 # to keep track of entry number (private)
         self._total_expense = 0.0   # running total (private)
         self._category_totals = {"Food": 0, "Transport": 0, "Shopping": 0, "Bills": 0, "Others": 0} #Initialize category totals
+        self._store = None  # ColumnarExpenseStore that holds the expense rows
         
     # Getter and setter  (proctected fields)  
     def get_total_expense(self):
@@ -32,8 +45,853 @@ class ExpenseBase:
          
     def get_category_totals(self):
         return self._category_totals
+
+    def set_store(self, store):
+        self._store = store
+
+    def load_totals(self, rows):
+        """Set the running total and category totals from store rows (NumPy sums, no Python loop)."""
+        self.set_total_expense(self._store.total(rows))
+        self._category_totals = {"Food": 0, "Transport": 0, "Shopping": 0, "Bills": 0, "Others": 0}
+        for category, amount in self._store.category_totals(rows).items():
+            self._category_totals[category] = amount
     
 
+class ExpenseJournal:
+    """Append-only expenses file with a stable id for every row.
+
+    Record line:    <id>,<date>,<category>,<remarks>,<amount>
+    Tombstone line: D,<id>   (the row with that id was deleted)
+    Old lines without an id (<date>,<category>,<remarks>,<amount>) are still read,
+    they get their id from their position so it is the same on every load.
+    """
+    TOMBSTONE = "D"
+
+    def __init__(self, path="expenses.txt", compact_after=500):
+        self.path = path
+        self.compact_after = compact_after  # dead lines allowed before the file is compacted
+        self._lock = threading.Lock()  # appends and the final swap of a compaction
+        self._next_id = 1
+        self._dead_lines = 0
+        self._compacting = False
+        self.on_compact = None  # called on the compaction thread, under the lock, once the new file is in place
+
+    @property
+    def dead_lines(self):
+        """Lines a compaction would drop, tombstones and the records they kill."""
+        return self._dead_lines
+
+    def resume(self, next_id, dead_lines):
+        """Carry on appending without reading the file (the expense store already knows its state)."""
+        self._next_id = next_id
+        self._dead_lines = dead_lines
+
+    def load(self):
+        """Read the whole journal and return {id: expense} for the rows still alive."""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as f:
+            expenses, self._dead_lines, self._next_id = self._parse(f)
+        return expenses
+
+    def append(self, expense):
+        """Give the expense a new id and write it as one line."""
+        return self.append_many([expense])[0]
+
+    def append_many(self, expenses):
+        """Give every expense a new id and write them all with one buffered write."""
+        with self._lock:
+            for expense in expenses:
+                expense["id"] = self._next_id
+                self._next_id += 1
+            with open(self.path, "a") as f:
+                f.write("".join(self._format(expense) for expense in expenses))
+        return expenses
+
+    def delete(self, expense_id):
+        """Write a tombstone for one row, the rest of the file is not touched."""
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(f"{self.TOMBSTONE},{expense_id}\n")
+            self._dead_lines += 2  # the tombstone and the record it kills
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._dead_lines < self.compact_after or self._compacting:
+            return
+        self._compacting = True
+        threading.Thread(target=self._compact, daemon=True).start()
+
+    def _compact(self):
+        # rewrite only the live rows into a temp file, then swap it in
+        try:
+            with self._lock:
+                end = os.path.getsize(self.path)
+            with open(self.path, "rb") as f:
+                head = io.TextIOWrapper(io.BytesIO(f.read(end)))  # same encoding as open()
+            expenses, _, _ = self._parse(head)
+
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                for expense in expenses.values():
+                    f.write(self._format(expense))
+
+            with self._lock:
+                # lines appended while we were writing go to the end unchanged
+                with open(self.path, "rb") as f:
+                    f.seek(end)
+                    tail = f.read()
+                with open(tmp_path, "ab") as f:
+                    f.write(tail)
+                os.replace(tmp_path, self.path)
+                tombstone = f"{self.TOMBSTONE},".encode()
+                self._dead_lines = 2 * sum(1 for line in tail.splitlines() if line.startswith(tombstone))
+                if self.on_compact is not None:
+                    self.on_compact()
+        except OSError:
+            pass  # keep the old file, it is still valid
+        finally:
+            self._compacting = False
+
+    def _parse(self, lines):
+        expenses = {}
+        dead = 0
+        next_id = 1
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split(",")
+            if parts[0] == self.TOMBSTONE:
+                expense_id = int(parts[1])
+                expenses.pop(expense_id, None)
+                dead += 2
+                next_id = max(next_id, expense_id + 1)  # never hand out an id a tombstone still points at
+                continue
+            if parts[0].isdigit():
+                expense_id = int(parts[0])
+                parts = parts[1:]
+            else:
+                expense_id = next_id  # old line without an id
+            next_id = max(next_id, expense_id + 1)
+            expenses[expense_id] = {
+                "id": expense_id,
+                "date": parts[0],
+                "category": parts[1],
+                "remarks": ",".join(parts[2:-1]),  # remarks may contain commas
+                "amount": float(parts[-1])
+            }
+        return expenses, dead, next_id
+
+    @staticmethod
+    def _format(expense):
+        return f"{expense['id']},{expense['date']},{expense['category']},{expense['remarks']},{expense['amount']:.2f}\n"
+
+
+class ColumnarExpenseStore:
+    """Binary copy of the journal, one memory-mapped NumPy file per column.
+
+    ids.bin        int64   journal id
+    dates.bin      int32   days since 1970-01-01
+    categories.bin uint8   code into meta["categories"]
+    cents.bin      int64   amount in cents
+    live.bin       uint8   0 once the row is deleted
+    remarks.idx    int64   end offset of each remark in remarks.heap
+    remarks.heap   uint8   all remarks as utf-8, back to back
+    meta.json      categories, next id, deleted rows left in the journal and the journal size it matches
+
+    Opening only maps the files, so it takes the same time for 10 rows or 1M rows.
+    The journal stays the real ledger: if its size does not match meta.json the
+    store is rebuilt from it once.
+    """
+    EPOCH = Date(1970, 1, 1)
+    MAX_CATEGORIES = 256  # category codes are one byte
+    COLUMNS = {
+        "ids": ("ids.bin", np.int64),
+        "dates": ("dates.bin", np.int32),
+        "categories": ("categories.bin", np.uint8),
+        "cents": ("cents.bin", np.int64),
+        "live": ("live.bin", np.uint8),
+        "remark_ends": ("remarks.idx", np.int64),
+        "heap": ("remarks.heap", np.uint8),
+    }
+
+    def __init__(self, folder, journal):
+        self.folder = folder
+        self.journal = journal
+        self.meta = {}
+        self._cols = None  # column name -> memmap, created lazily
+        self._month_keys = None  # months since 1970-01 of every row, for month lookups
+        self._meta_lock = threading.Lock()  # meta.json is also saved from the compaction thread
+        # a compaction changes the journal size and drops its dead lines, save that right away
+        journal.on_compact = self._save_meta
+
+    def open(self):
+        os.makedirs(self.folder, exist_ok=True)
+        meta_path = os.path.join(self.folder, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                self.meta = json.load(f)
+        if self.meta.get("journal_size") != self._journal_size():
+            self._rebuild(self.journal.load())
+        self.journal.resume(self.meta["next_id"], 2 * self.meta["dead_rows"])
+
+    def __len__(self):
+        return len(self._columns()["ids"])
+
+    # ---------- reading ----------
+    def month_rows(self, year, month):
+        """Positions of the live rows dated in that month, in the order they were added."""
+        cols = self._columns()
+        if self._month_keys is None:
+            days = np.asarray(cols["dates"]).astype("datetime64[D]")
+            self._month_keys = days.astype("datetime64[M]").astype(np.int32)
+        key = (year - 1970) * 12 + month - 1
+        return np.flatnonzero((self._month_keys == key) & (cols["live"] == 1))
+
+    def ids(self, rows):
+        return self._columns()["ids"][rows]
+
+    def order(self, rows, column, descending=False):
+        """rows sorted by one table column, with a stable NumPy argsort."""
+        cols = self._columns()
+        match column:
+            case "date":
+                keys = cols["dates"][rows]
+            case "amount":
+                keys = cols["cents"][rows]
+            case "category":
+                # rank of each category code in alphabetical order
+                names = self.meta["categories"]
+                rank = np.argsort(np.argsort(np.array(names, dtype=object)))
+                keys = rank[cols["categories"][rows]]
+            case "remarks":
+                keys = np.array([self.row(pos)["remarks"].lower() for pos in rows.tolist()], dtype=object)
+            case _:
+                keys = rows  # store position, the order the expenses were added
+        order = np.argsort(keys, kind="stable")
+        return rows[order[::-1]] if descending else rows[order]
+
+    def live_columns(self):
+        """dates, category codes and cents of every row still alive, and the category names (for the rollups)."""
+        cols = self._columns()
+        live = cols["live"] == 1
+        return cols["dates"][live], cols["categories"][live], cols["cents"][live], self.meta["categories"]
+
+    def years(self):
+        """Every year between the oldest and the newest expense."""
+        cols = self._columns()
+        dates = cols["dates"][cols["live"] == 1]
+        if not len(dates):
+            return []
+        first, last = (int(d) + 1970 for d in np.array([dates.min(), dates.max()]).astype("datetime64[D]")
+                       .astype("datetime64[Y]").astype(np.int64))
+        return list(range(first, last + 1))
+
+    def row_keys(self, rows):
+        """Duplicate-check keys (see ExpenseImporter.key) of the given rows."""
+        return {ExpenseImporter.key(self.row(pos)) for pos in rows.tolist()}
+
+    def row(self, pos):
+        cols = self._columns()
+        start = int(cols["remark_ends"][pos - 1]) if pos > 0 else 0
+        end = int(cols["remark_ends"][pos])
+        remarks = cols["heap"][start:end].tobytes().decode("utf-8")
+        return {
+            "id": int(cols["ids"][pos]),
+            "date": str(np.datetime64(int(cols["dates"][pos]), "D")),
+            "category": self.meta["categories"][cols["categories"][pos]],
+            "remarks": remarks,
+            "amount": int(cols["cents"][pos]) / 100
+        }
+
+    def total(self, rows):
+        return float(self._columns()["cents"][rows].sum()) / 100
+
+    def category_totals(self, rows):
+        cols = self._columns()
+        sums = np.bincount(cols["categories"][rows], weights=cols["cents"][rows],
+                           minlength=len(self.meta["categories"]))
+        return {name: float(sums[code]) / 100 for code, name in enumerate(self.meta["categories"]) if sums[code]}
+
+    # ---------- writing ----------
+    def append(self, expense):
+        """Add one expense (already written to the journal) and return its row position."""
+        return self.append_many([expense])
+
+    def append_many(self, expenses):
+        """Add expenses already written to the journal, return the row position of the first one."""
+        pos = len(self)
+        if expenses:
+            self._append_rows(expenses)
+            self.meta["next_id"] = expenses[-1]["id"] + 1
+            self._save_meta()
+        return pos
+
+    def fit_categories(self, expenses):
+        """Move expenses whose new category has no code left to "Others", return how many were moved.
+
+        Call it before the expenses are written anywhere, append_many() refuses them otherwise.
+        """
+        known = set(self.meta["categories"])
+        moved = 0
+        for expense in expenses:
+            if expense["category"] in known:
+                continue
+            if len(known) < self.MAX_CATEGORIES:
+                known.add(expense["category"])
+            else:
+                expense["category"] = "Others"
+                moved += 1
+        return moved
+
+    def delete(self, pos):
+        """Mark one row as deleted, only one byte of live.bin changes."""
+        live = self._columns()["live"]
+        live[pos] = 0
+        live.flush()
+        self._save_meta()
+
+    def _rebuild(self, expenses):
+        for name, dtype in self.COLUMNS.values():
+            open(self._path(name), "wb").close()
+        self.meta = {"categories": ["Food", "Transport", "Shopping", "Bills", "Others"],
+                     "next_id": self.journal._next_id, "dead_rows": 0}
+        self._append_rows(list(expenses.values()))
+        self._save_meta()
+
+    def _append_rows(self, expenses):
+        if not expenses:
+            return
+        self._close()
+        categories = self.meta["categories"]
+        codes = []
+        for expense in expenses:
+            if expense["category"] not in categories:
+                if len(categories) == self.MAX_CATEGORIES:
+                    raise ValueError(f"The expense store supports at most {self.MAX_CATEGORIES} categories.")
+                categories.append(expense["category"])  # e.g. a custom "Others" name
+            codes.append(categories.index(expense["category"]))
+        remarks = [expense["remarks"].encode("utf-8") for expense in expenses]
+        heap_size = os.path.getsize(self._path("remarks.heap"))
+        columns = {
+            "heap": np.frombuffer(b"".join(remarks), dtype=np.uint8),
+            "ids": [expense["id"] for expense in expenses],
+            "dates": [(Date.fromisoformat(expense["date"]) - self.EPOCH).days for expense in expenses],
+            "categories": codes,
+            "cents": [round(expense["amount"] * 100) for expense in expenses],
+            "live": [1] * len(expenses),
+            "remark_ends": heap_size + np.cumsum([len(r) for r in remarks]),
+        }
+        for column, values in columns.items():
+            name, dtype = self.COLUMNS[column]
+            with open(self._path(name), "ab") as f:
+                np.asarray(values, dtype=dtype).tofile(f)
+
+    def _columns(self):
+        if self._cols is None:
+            self._cols = {}
+            for column, (name, dtype) in self.COLUMNS.items():
+                if os.path.getsize(self._path(name)) == 0:
+                    self._cols[column] = np.zeros(0, dtype=dtype)  # empty files cannot be mapped
+                else:
+                    mode = "r+" if column == "live" else "r"
+                    self._cols[column] = np.memmap(self._path(name), dtype=dtype, mode=mode)
+        return self._cols
+
+    def _close(self):
+        # drop the maps before a file grows, they are recreated on the next read
+        self._cols = None
+        self._month_keys = None
+
+    def _save_meta(self):
+        with self._meta_lock:
+            # deleted rows the journal still holds, a compaction brings this back to 0
+            self.meta["dead_rows"] = self.journal.dead_lines // 2
+            self.meta["journal_size"] = self._journal_size()
+            with open(self._path("meta.json.tmp"), "w") as f:
+                json.dump(self.meta, f)
+            os.replace(self._path("meta.json.tmp"), self._path("meta.json"))
+
+    def _journal_size(self):
+        return os.path.getsize(self.journal.path) if os.path.exists(self.journal.path) else 0
+
+    def _path(self, name):
+        return os.path.join(self.folder, name)
+
+
+class ExpenseImporter:
+    """Reads a CSV or OFX bank statement on a worker thread.
+
+    CSV: date,category,remarks,amount (a header row may name the columns in any order).
+         expense_sign says which amounts are expenses: -1 for bank exports where money
+         going out is negative, 1 for lists of expenses; rows with the other sign
+         (salary, refunds) are skipped.
+    OFX: every <STMTTRN> with a negative <TRNAMT> becomes an "Others" expense.
+    Rows are validated and duplicates inside the file are dropped. The window polls
+    self.messages: ("progress", bytes_read, total_bytes), ("done", expenses, skipped)
+    or ("error", message).
+    """
+    PROGRESS_EVERY = 2000  # rows between two progress messages
+    HEADER_NAMES = {
+        "date": ("date", "transaction date", "posting date"),
+        "category": ("category", "type"),
+        "remarks": ("remarks", "description", "details", "memo", "name"),
+        "amount": ("amount", "debit", "value"),
+    }
+
+    def __init__(self, path, expense_sign=-1):
+        self.path = path
+        self.expense_sign = expense_sign
+        self.messages = queue.Queue()
+        self.bytes_read = 0
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop reading at the next progress point, no "done" message is sent."""
+        self.cancelled.set()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    @staticmethod
+    def key(expense):
+        return (expense["date"], expense["category"], expense["remarks"], round(expense["amount"] * 100))
+
+    def _run(self):
+        try:
+            total = os.path.getsize(self.path)
+            expenses, seen, skipped = [], set(), 0
+            with open(self.path, "rb") as f:
+                if self.path.lower().endswith((".ofx", ".qfx")):
+                    rows, sign = self._read_ofx(self._lines(f)), -1
+                else:
+                    rows, sign = self._read_csv(self._lines(f)), self.expense_sign
+                for count, row in enumerate(rows, 1):
+                    expense = self._validate(row, sign)
+                    if expense is None or self.key(expense) in seen:
+                        skipped += 1
+                    else:
+                        seen.add(self.key(expense))
+                        expenses.append(expense)
+                    if count % self.PROGRESS_EVERY == 0:
+                        if self.cancelled.is_set():
+                            return
+                        self.messages.put(("progress", self.bytes_read, total))
+            self.messages.put(("done", expenses, skipped))
+        except (OSError, UnicodeError, csv.Error) as e:
+            self.messages.put(("error", str(e)))
+
+    def _lines(self, f):
+        # count bytes so progress can be shown while the file is streamed
+        for raw in f:
+            self.bytes_read += len(raw)
+            yield raw.decode("utf-8-sig" if self.bytes_read == len(raw) else "utf-8", errors="replace")
+
+    def _read_csv(self, lines):
+        columns = {"date": 0, "category": 1, "remarks": 2, "amount": 3}
+        for number, cells in enumerate(csv.reader(lines)):
+            if not cells:
+                continue
+            if number == 0 and self._parse_date(cells[0]) is None:
+                # header row: find the columns by name
+                names = [cell.strip().lower() for cell in cells]
+                columns = {field: next((names.index(n) for n in options if n in names), None)
+                           for field, options in self.HEADER_NAMES.items()}
+                continue
+            yield {field: cells[i] if i is not None and i < len(cells) else ""
+                   for field, i in columns.items()}
+
+    def _read_ofx(self, lines):
+        transaction = None
+        for line in lines:
+            for tag, value in re.findall(r"<(/?\w+)>([^<\r\n]*)", line):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    transaction = {}
+                elif tag == "/STMTTRN" and transaction is not None:
+                    amount = transaction.get("TRNAMT", "")
+                    if amount.strip().startswith("-"):  # only money going out is an expense
+                        yield {"date": transaction.get("DTPOSTED", "")[:8], "category": "Others",
+                               "remarks": transaction.get("MEMO") or transaction.get("NAME", ""),
+                               "amount": amount}
+                    transaction = None
+                elif transaction is not None:
+                    transaction[tag] = value.strip()
+
+    def _validate(self, row, sign):
+        date = self._parse_date(row["date"])
+        try:
+            amount = sign * float(row["amount"].replace(",", "").strip())  # money in has the other sign
+        except ValueError:
+            return None
+        if date is None or amount <= 0:
+            return None
+        # commas are fine in remarks, line breaks would split the journal line
+        remarks = " ".join(row["remarks"].split()).capitalize()
+        # the category is a single journal field, so it cannot hold a comma either
+        category = " ".join(row["category"].replace(",", " ").split())
+        return {"date": date, "category": category or "Others",
+                "remarks": remarks, "amount": round(amount, 2)}
+
+    @staticmethod
+    def _parse_date(text):
+        for pattern in ("%Y-%m-%d", "%Y%m%d", "%d/%m/%Y"):
+            try:
+                return datetime.strptime(text.strip(), pattern).strftime("%Y-%m-%d")
+            except ValueError:
+                pass
+        return None
+
+
+class CategoryPieChart:
+    """Pie chart and category labels that are built once and then only updated.
+
+    update() moves the wedge angles and changes the texts, nothing is cleared or
+    recreated. Redraws go through canvas.draw_idle(), so many updates before Tk is
+    idle paint the chart once.
+    """
+    TITLE = "Expenses by Category"
+
+    def __init__(self, ax, canvas, totals_frame):
+        self.ax = ax
+        self.canvas = canvas
+        self.totals_frame = totals_frame
+        self.slices = {}  # category -> (wedge, name text, percentage text)
+        self.labels = {}  # category -> tk.Label beside the chart
+        self._colors = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+
+        # same look as ax.pie(): round, no frame, no ticks
+        self.ax.set(frame_on=False, xticks=[], yticks=[], xlim=(-1.25, 1.25), ylim=(-1.25, 1.25))
+        self.ax.set_aspect("equal")
+        self.ax.set_title(self.TITLE)
+
+        # grey circle shown when there is no data for the month
+        self.empty_wedge = Wedge((0, 0), 1, 0, 360, facecolor="lightgrey")
+        self.ax.add_patch(self.empty_wedge)
+        self.empty_text = self.ax.text(1.1, 0, "Empty", ha="left", va="center")
+
+    def update(self, totals):
+        values = {cat: val for cat, val in totals.items() if val > 0}
+        total = sum(values.values())
+
+        # Draw the slices starting from 90 degree, counter-clockwise like ax.pie(startangle=90)
+        theta = 90.0
+        for category, (wedge, name, pct) in self._slices_for(totals).items():
+            amount = values.get(category, 0)
+            visible = amount > 0
+            for artist in (wedge, name, pct):
+                artist.set_visible(visible)
+            if not visible:
+                continue
+            share = amount / total
+            wedge.set_theta1(theta)
+            wedge.set_theta2(theta + 360 * share)
+            middle = np.deg2rad(theta + 180 * share)
+            x, y = np.cos(middle), np.sin(middle)
+            name.set_position((1.1 * x, 1.1 * y))
+            name.set_horizontalalignment("left" if x > 0 else "right")
+            pct.set_position((0.6 * x, 0.6 * y))
+            pct.set_text(f"{share * 100:.1f}%")
+            theta += 360 * share
+
+        self.empty_wedge.set_visible(total == 0)
+        self.empty_text.set_visible(total == 0)
+
+        # update the category totals labels, only the text changes
+        for category, lbl in self.labels.items():
+            if category in totals:
+                text = f"{category}: RM{totals[category]:.2f}"
+                if lbl.cget("text") != text:
+                    lbl.config(text=text)
+                if not lbl.winfo_manager():
+                    lbl.pack(anchor="w")
+            elif lbl.winfo_manager():
+                lbl.pack_forget()  # e.g. a custom category from another month
+
+        self.canvas.draw_idle()  # Tk paints once even if asked many times before it is idle
+
+    def _slices_for(self, totals):
+        # create the wedge and label of a category the first time it is seen
+        for category in totals:
+            if category not in self.slices:
+                color = self._colors[len(self.slices) % len(self._colors)]
+                wedge = Wedge((0, 0), 1, 90, 90, facecolor=color)
+                self.ax.add_patch(wedge)
+                name = self.ax.text(0, 0, category, va="center")
+                pct = self.ax.text(0, 0, "", ha="center", va="center")
+                self.slices[category] = (wedge, name, pct)
+            if category not in self.labels:
+                lbl = tk.Label(self.totals_frame, text=f"{category}: RM0.00", font=("Arial", 10))
+                lbl.pack(anchor="w")  # left-align inside the frame
+                self.labels[category] = lbl
+        return self.slices
+
+
+class ExpenseRollup:
+    """Totals per period and category, kept up to date as expenses come and go.
+
+    Periods are numbers: day = days since 1970-01-01, week = Monday weeks since then,
+    month = months since 1970-01, year = the year itself. Every cell is in cents and
+    the category None holds the total of all categories. Queries only read cells, so
+    they cost the number of periods asked for, not the number of expenses.
+    """
+    GRAINS = ("day", "week", "month", "year")
+
+    def __init__(self):
+        self.cells = {grain: {} for grain in self.GRAINS}  # grain -> {(period, category): cents}
+        self.categories = set()
+
+    def build(self, days, codes, cents, names):
+        """Fill every cell at once from store columns (NumPy group-by, no Python loop per row)."""
+        used = np.unique(codes).tolist()
+        self.categories = {names[code] for code in used}
+        for grain, periods in self.periods(days).items():
+            cells = self.cells[grain] = {}
+            for code in used + [None]:
+                mask = slice(None) if code is None else codes == code
+                category = None if code is None else names[code]
+                keys, groups = np.unique(periods[mask], return_inverse=True)
+                sums = np.bincount(groups, weights=cents[mask], minlength=len(keys))
+                cells.update({(int(k), category): int(v) for k, v in zip(keys, sums)})
+
+    def add(self, expense, sign=1):
+        days = (Date.fromisoformat(expense["date"]) - ColumnarExpenseStore.EPOCH).days
+        cents = sign * round(expense["amount"] * 100)
+        self.categories.add(expense["category"])
+        for grain, periods in self.periods(np.array([days])).items():
+            for category in (expense["category"], None):
+                key = (int(periods[0]), category)
+                self.cells[grain][key] = self.cells[grain].get(key, 0) + cents
+
+    def remove(self, expense):
+        self.add(expense, sign=-1)
+
+    @staticmethod
+    def periods(days):
+        months = np.asarray(days).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        return {
+            "day": np.asarray(days, dtype=np.int64),
+            "week": (np.asarray(days, dtype=np.int64) + 3) // 7,  # 1970-01-01 was a Thursday
+            "month": months,
+            "year": months // 12 + 1970,
+        }
+
+    # ---------- queries ----------
+    def series(self, grain, start, stop, category=None):
+        """Totals in RM for periods start .. stop-1."""
+        cells = self.cells[grain]
+        return np.array([cells.get((p, category), 0) for p in range(start, stop)], dtype=float) / 100
+
+    def year_over_year(self, years, category=None):
+        """{year: 12 monthly totals} to compare the same month across years."""
+        return {year: self.series("month", (year - 1970) * 12, (year - 1969) * 12, category) for year in years}
+
+    def rolling_average(self, grain, start, stop, window, category=None):
+        """Mean of the last `window` periods for every period start .. stop-1."""
+        values = self.series(grain, start - window + 1, stop, category)
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        return (sums[window:] - sums[:-window]) / window
+
+    def trend(self, grain, start, stop, category=None):
+        """Totals and the least-squares trend line through them."""
+        values = self.series(grain, start, stop, category)
+        if len(values) < 2:
+            return values, values
+        slope, intercept = np.polyfit(np.arange(len(values)), values, 1)
+        return values, intercept + slope * np.arange(len(values))
+
+
+class ExpenseAnalytics:
+    """Window with year-over-year, rolling average and category trend charts."""
+    VIEWS = ("Year over year", "Rolling average", "Category trends")
+    SPAN = {"day": 90, "week": 52, "month": 24}  # how many periods the charts show
+    WINDOW = {"day": 7, "week": 4, "month": 3}
+
+    def __init__(self, root, rollup, store):
+        self.root = root
+        self.rollup = rollup
+        self.store = store
+        self.years = store.years()
+        self.root.title("Expense Analytics")
+
+        controls = tk.Frame(root, bg="gold")
+        controls.pack(fill="x")
+        self.view_combo = ttk.Combobox(controls, values=self.VIEWS, state="readonly", width=16)
+        self.view_combo.set(self.VIEWS[0])
+        self.view_combo.pack(side="left", padx=5, pady=3)
+        self.grain_combo = ttk.Combobox(controls, values=["day", "week", "month"], state="readonly", width=8)
+        self.grain_combo.set("month")
+        self.grain_combo.pack(side="left", padx=5, pady=3)
+        for combo in (self.view_combo, self.grain_combo):
+            combo.bind("<<ComboboxSelected>>", self.draw)
+
+        self.fig = Figure(figsize=(6.4, 3.6), dpi=100)
+        self.ax = self.fig.add_subplot(111)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=root)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.draw()
+
+    def draw(self, event=None):
+        self.ax.clear()
+        grain = self.grain_combo.get()
+        now = self._period(grain, datetime.now())
+        start = now - self.SPAN[grain] + 1
+        match self.view_combo.get():
+            case "Year over year":
+                months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+                for year, values in self.rollup.year_over_year(self.years).items():
+                    self.ax.plot(months, values, marker="o", label=str(year))
+                self.ax.set_title("Monthly expenses, year over year")
+            case "Rolling average":
+                totals = self.rollup.series(grain, start, now + 1)
+                window = self.WINDOW[grain]
+                self.ax.bar(range(len(totals)), totals, color="lightgrey", label=f"Total per {grain}")
+                self.ax.plot(self.rollup.rolling_average(grain, start, now + 1, window),
+                             color="blue", label=f"{window}-{grain} average")
+                self.ax.set_title(f"Expenses per {grain} (last {self.SPAN[grain]})")
+            case "Category trends":
+                for category in sorted(self.rollup.categories):
+                    values, line = self.rollup.trend(grain, start, now + 1, category)
+                    if values.any():
+                        drawn = self.ax.plot(values, label=category)
+                        self.ax.plot(line, linestyle="--", color=drawn[0].get_color())
+                self.ax.set_title(f"Category trends per {grain} (dashed = trend)")
+        self.ax.set_ylabel("RM")
+        if self.ax.get_legend_handles_labels()[0]:
+            self.ax.legend(fontsize=8)
+        self.canvas.draw_idle()
+
+    def refresh(self):
+        """Redraw after expenses were added, deleted or imported (the year list may have changed)."""
+        self.years = self.store.years()
+        self.draw()
+
+    @staticmethod
+    def _period(grain, when):
+        days = (when.date() - ColumnarExpenseStore.EPOCH).days
+        return int(ExpenseRollup.periods(np.array([days]))[grain][0])
+
+
+class VirtualTable:
+    """Treeview that only holds as many items as fit on screen.
+
+    The rows live in self.keys (any values, e.g. store rows) and fetch(key, index)
+    gives the values to show. Scrolling rewrites the few visible items, so it costs
+    the same for 10 rows or 100k rows. sort(keys, column, descending) is called when
+    a heading is clicked and must return the keys in the new order.
+    """
+
+    def __init__(self, master, columns, height, fetch, sort=None):
+        self.tree = ttk.Treeview(master, columns=columns, show="headings", height=height, selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(master, orient="vertical", command=self.yview)
+        self.height = height
+        self.fetch = fetch
+        self.sort = sort
+        self.keys = []
+        self.positions = {}  # key -> its index in self.keys
+        self.first = 0  # index in self.keys of the top visible row
+        self.selected = None  # key of the selected row (items are reused, keys are not)
+        self._sorted_by = (None, False)
+
+        # the only items the Treeview ever has
+        self.slots = [self.tree.insert("", "end", iid=f"slot{i}") for i in range(height)]
+        for column in columns:
+            self.tree.heading(column, command=lambda c=column: self.sort_by(c))
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(int(-1 * (e.delta / 120))))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1))  # mouse wheel on Linux
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1))
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self.move_selection(1))
+
+    def set_rows(self, keys):
+        self.keys = list(keys)
+        self.first = 0
+        self.selected = None
+        column, descending = self._sorted_by
+        if column is not None and self.sort is not None:
+            self.keys = list(self.sort(self.keys, column, descending))
+        self._index_keys()
+        self.render()
+
+    def remove(self, key):
+        index = self.positions.pop(key)
+        del self.keys[index]
+        # only the rows below the removed one move up
+        self.positions.update((k, i) for i, k in enumerate(self.keys[index:], index))
+        if self.selected == key:
+            self.selected = None
+        self.scroll(0)  # keeps the window inside the shorter list
+
+    def sort_by(self, column):
+        if self.sort is None:
+            return
+        last_column, descending = self._sorted_by
+        descending = (not descending) if column == last_column else False
+        self._sorted_by = (column, descending)
+        self.keys = list(self.sort(self.keys, column, descending))
+        self._index_keys()
+        self.first = 0
+        self.render()
+
+    def scroll(self, rows):
+        self.first = max(0, min(self.first + rows, len(self.keys) - self.height))
+        self.render()
+        return "break"
+
+    def yview(self, action, value, unit=None):
+        # scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+        if action == "moveto":
+            self.first = int(float(value) * len(self.keys))
+            self.scroll(0)
+        else:
+            self.scroll(int(value) * (self.height if unit == "pages" else 1))
+
+    def move_selection(self, step):
+        if not self.keys:
+            return "break"
+        index = self.positions[self.selected] + step if self.selected in self.positions else 0
+        index = max(0, min(index, len(self.keys) - 1))
+        self.selected = self.keys[index]
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self.height:
+            self.first = index - self.height + 1
+        self.render()
+        return "break"
+
+    def _index_keys(self):
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+
+    def render(self):
+        shown = self.keys[self.first:self.first + self.height]
+        selected_slot = None
+        for i, slot in enumerate(self.slots):
+            if i < len(shown):
+                self.tree.move(slot, "", i)  # puts back a slot hidden by detach
+                self.tree.item(slot, values=self.fetch(shown[i], self.first + i))
+                if shown[i] == self.selected:
+                    selected_slot = slot
+            else:
+                self.tree.detach(slot)
+        if selected_slot is not None:
+            self.tree.selection_set(selected_slot)
+        else:
+            self.tree.selection_set(())
+
+        total = max(len(self.keys), 1)
+        self.scrollbar.set(self.first / total, min(1, (self.first + self.height) / total))
+
+    def _on_select(self, event=None):
+        selection = self.tree.selection()
+        if selection:  # an empty selection only means the selected row scrolled away
+            index = self.first + self.slots.index(selection[0])
+            if index < len(self.keys):
+                self.selected = self.keys[index]
+
+
 class Expenses_Tracker(ExpenseBase):
     def __init__(self, root): #constructor
         super().__init__() # Initialize base class
@@ -46,10 +904,18 @@ class Expenses_Tracker(ExpenseBase):
         self.root.config(menu = menubar)
 
 
+        fileMenu = tk.Menu(menubar, tearoff = 0)
+        fileMenu.add_command(label = "Import Statement...", command = self.import_expenses)
+
+        viewMenu = tk.Menu(menubar, tearoff = 0)
+        viewMenu.add_command(label = "Analytics...", command = self.open_analytics)
+
         exitMenu = tk.Menu(menubar, tearoff = 0)
         exitMenu.add_command(label = "Return", command = self.return_to_main)
         exitMenu.add_command(label = "Quit", command = self.root.destroy)
 
+        menubar.add_cascade(label = "File", menu = fileMenu)
+        menubar.add_cascade(label = "View", menu = viewMenu)
         menubar.add_cascade(label = "Exit", menu = exitMenu)
         
         #Top   label
@@ -60,7 +926,7 @@ class Expenses_Tracker(ExpenseBase):
         # Month and Year selection
         self.months = [ "January", "February", "March", "April", "May", "June",
                 "July", "August", "September", "October", "November", "December"]
-        self.years = [2024, 2025, 2026]  # example range of years
+        self.years = [datetime.now().year]  # filled from the ledger once it is loaded
         
         #Get the current year and month
         current_month = datetime.now().month   
@@ -109,12 +975,9 @@ class Expenses_Tracker(ExpenseBase):
         self.totals_frame = tk.Frame(frame)
         self.totals_frame.grid(row=7, column=1, sticky="nw", padx=20, pady=10)
 
-        # Create labels for each category
-        self.category_labels = {}
-        for category in self._category_totals.keys():
-            lbl = tk.Label(self.totals_frame, text=f"{category}: RM0.00", font=("Arial", 10))
-            lbl.pack(anchor="w")  # left-align inside the frame
-            self.category_labels[category] = lbl
+        # Slices and labels for each category, kept alive between updates
+        self.chart = CategoryPieChart(self.ax, self.canvas, self.totals_frame)
+        self.chart.update(self._category_totals)
         #--------------------------------------------
         
         # Get screen width and height
@@ -128,7 +991,15 @@ class Expenses_Tracker(ExpenseBase):
         # Place the window at the center when running the program
         self.root.geometry(f"{app_width}x{app_height}+{x}+{y}")
 
-        self.expenses = []  # A list to store all expenses
+        # (year, month) -> {expense id: store row}, filled the first time a month is shown
+        self._month_index = {}
+        self.rollup = None  # ExpenseRollup, built the first time analytics are opened
+        self.analytics = None  # ExpenseAnalytics window while it is open
+        self.importer = None  # ExpenseImporter while a statement is being read
+        self.import_job = None
+        self.journal = ExpenseJournal("expenses.txt")
+        self.store = ColumnarExpenseStore("expense_store", self.journal)
+        self.set_store(self.store)
        
         #category selection
         categories = ["Food", "Transport", "Shopping", "Bills", "Others"]
@@ -166,7 +1037,9 @@ class Expenses_Tracker(ExpenseBase):
 
         # Output area
         columns = ("no.", "date", "category", "remarks", "amount")
-        self.tree = ttk.Treeview(frame, columns=columns, show="headings", height=6) #Create a table
+        # Create a table, only the visible rows exist as Treeview items
+        self.table = VirtualTable(frame, columns, 6, self._row_values, self._sort_rows)
+        self.tree = self.table.tree
         #table headings
         self.tree.heading("no.", text="No.") 
         self.tree.heading("date", text="Date") 
@@ -182,6 +1055,7 @@ class Expenses_Tracker(ExpenseBase):
         self.tree.column("remarks", width=200, anchor="w")   # left align text(w)
         self.tree.column("amount", width=100, anchor="w")    # right align numbers(e)
         self.tree.grid(row=6, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
+        self.table.scrollbar.grid(row=6, column=2, pady=5, sticky="ns")
         self.load_expenses()  # Load the data from the txt file 
         self.update_chart()
     
@@ -189,7 +1063,6 @@ class Expenses_Tracker(ExpenseBase):
     #Function to add an expense
     def add_expense(self):
         # Get date from entry box
-        row_no = len(self.tree.get_children()) + 1
         date_text = self.date_entry.get().strip()
         try:
             # Validate date format
@@ -208,7 +1081,8 @@ class Expenses_Tracker(ExpenseBase):
             tk.messagebox.showerror("Invalid input","Please enter a valid number for amount.")
             return
         
-        category = self.category_combo.get().strip()
+        # a custom category is one journal field, so no commas or line breaks in it
+        category = " ".join(self.category_combo.get().replace(",", " ").split())
         #force user to select a category
         match category:
             #if user didnt select any category
@@ -221,40 +1095,22 @@ class Expenses_Tracker(ExpenseBase):
         #Set the first letter to uppercase
         remarks = self.remarks_entry.get().capitalize()
         
-         # Row number = current table length + 1 
-        row_no = len(self.tree.get_children()) + 1
-        
-         # Check if expense belongs to current month/year
-        year, month, day = map(int, date.split("-"))
-        current_year = int(self.year_combo.get())
-        current_month = self.months.index(self.month_combo.get()) + 1
-
-        if year == current_year and month == current_month:
-            # Insert into current table
-            self.tree.insert("", "end", values=(row_no, date, category, remarks, amount))
-        
-         # Update running total
-        self.set_total_expense(self.get_total_expense() + amount)
-        self.expense_var.set(f"Expense: RM{self.get_total_expense():.2f}")
-        
-        # Update category total
-        year, month, day = map(int, date.split("-"))
-        current_year = int(self.year_combo.get())
-        current_month = self.months.index(self.month_combo.get()) + 1
-
-        if year == current_year and month == current_month:
-            # only update the current page’s chart
-            if category not in self._category_totals:
-                self._category_totals[category] = 0
-            self._category_totals[category] += amount
-
-        # Update the pie chart
-        self.update_chart()
-         
-        #Add the records of expenses into a text file
-        file_path = "expenses.txt"
-        with open(file_path, "a") as f:   #using "with" so the file will close automatically
-            f.write(f"{date},{category},{remarks},{amount:.2f}\n")
+        expense = {
+            "date": date,
+            "category": category,
+            "remarks": remarks,
+            "amount": amount
+        }
+        # the store has a code for at most 256 categories, check before anything is written
+        if self.store.fit_categories([expense]):
+            tk.messagebox.showinfo("Too many categories",
+                                   f"There is no room for the category \"{category}\", the expense is saved under Others.")
+
+        #Add the records of expenses into the journal (it gives the expense its id)
+        expense = self.journal.append(expense)
+
+        # keep the binary store and the month index in step with the file
+        self._index_expense(expense, self.store.append(expense))
     
         """Clear the entry fields after adding
            clear the data from the start line of the entry until to the end
@@ -270,6 +1126,7 @@ class Expenses_Tracker(ExpenseBase):
 
         # Refresh correct month view
         self.change_month()
+        self._refresh_analytics()
         
         #Clear all the input after adding an expense
         self.amount_entry.delete(0, tk.END)
@@ -286,61 +1143,15 @@ class Expenses_Tracker(ExpenseBase):
         else:
             self.category_combo.configure(state="readonly")  # cannot edit the selection box 
 
-    # Function to update the pie chart
+    # Function to update the pie chart (only angles and texts change)
     def update_chart(self):
-        # Clear the old chart
-        self.ax.clear()
-        # Get the current total category amount from the list
-        totals = self.get_category_totals()
-        # If the total amount is more that 0 ,then inlcude it in the pie chart
-        if sum(self.get_category_totals().values()) > 0:
-            """only take the category with data/value ,if no ignored the category
-               label mean the cegory name ,eg "Food" , "Transport"
-               value mean the amount of money spent in that category
-            """
-            labels = [cat for cat, val in self.get_category_totals().items() if val > 0]
-            values = [val for val in self.get_category_totals().values() if val > 0]
-            
-            # Draw the pie chart starting from 90 degreee
-            self.ax.pie(values, labels=labels, autopct="%1.1f%%", startangle=90)
-            self.ax.set_title("Expenses by Category")
-        else:
-            # Draw an empty pie (white circle) , if there is no any data for each categpry
-            self.ax.pie([1], labels=["Empty"], colors=["lightgrey"])
-            self.ax.set_title("Expenses by Category")
-            
-        for widget in self.totals_frame.winfo_children():
-            # delete all the old labels in the frame
-            widget.destroy()
-            
-         # update the category totals labels   
-        for category, amount in totals.items():
-            lbl = tk.Label(self.totals_frame, text=f"{category}: RM{amount:.2f}", font=("Arial", 10))
-            lbl.pack(anchor="w") #Align to the left
-                
-        # Redraw chart
-        self.canvas.draw()
+        self.chart.update(self.get_category_totals())
      
      #functon to load the expenses for everytime reopen the program   
     def load_expenses(self):
-        if not os.path.exists("expenses.txt"):   #if the file is not exist
-            return  # no file yet, skip
-        
-        #read the file and load data into the table
-        with open("expenses.txt", "r") as f:
-            line = f.readline()
-            while line:  # keep looping until no more lines
-                if line.strip():
-                    date, category, remarks, amount = line.strip().split(",")
-                    amount = float(amount)
-                    self.expenses.append({
-                        "date": date,
-                        "category": category,
-                        "remarks": remarks,
-                        "amount": amount
-                    })
-                line = f.readline()  # move to next line
-
+        #map the binary store (it is rebuilt from the journal only when they differ)
+        self.store.open()
+        self._refresh_years(self.store.years())
 
         # After loading, display the current month
         self.change_month()
@@ -350,51 +1161,31 @@ class Expenses_Tracker(ExpenseBase):
         selected_month = self.month_combo.get()
         selected_year = self.year_combo.get()
             
-        # Clear the current table before load a new data
-        for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Reset totals
-        self.set_total_expense(0)
-        self._category_totals = { "Food":0, "Transport":0, "Shopping":0, "Bills":0, "Others":0 }
+        """ Only the rows of the selected month are looked at (no file rescan)
+            Convert the month name in the array to index number
+            eg ."September" -->  index=8 +1 = 9
+        """
+        bucket = self._month_bucket(int(selected_year), self.months.index(selected_month) + 1)
+        rows = np.fromiter(bucket.values(), dtype=np.int64, count=len(bucket))
 
-        # Load expenses from file filtered by month/year
-        if not os.path.exists("expenses.txt"):
-            return
-            
-        # Loop the data of each line and skip the empty line
-        row_no = 1 
-        with open("expenses.txt", "r") as f:
-            for line in f:
-                if not line.strip(): 
-                    continue
-                date, category, remarks, amount = line.strip().split(",")
-                amount = float(amount)
-                year, month, day = map(int, date.split("-"))
-                    
-                """ Check if this expense matches selected month/year
-                    Convert the month name in the array to index number
-                    eg ."September" -->  index=8 +1 = 9
-                """
-                if month == self.months.index(selected_month)+1 and year == int(selected_year):
-                    self.tree.insert("", "end", values=(row_no, date, category, remarks, amount))
-                    row_no += 1
-                    self.set_total_expense(self.get_total_expense() + amount)
-                    if category not in self._category_totals:
-                        self._category_totals[category] = 0
-                    self._category_totals[category] += amount
+        # the table gets the store rows, it only fills the ones on screen
+        self._shown_rows = np.sort(rows)
+        self.table.set_rows(rows.tolist())
+
+        # totals are summed by NumPy over the month's rows
+        self.load_totals(rows)
 
         self.expense_var.set(f"Expense: RM{self.get_total_expense():.2f}")
         self.update_chart()  
         
         # Delete the record formthe table 
     def delete_expense(self):
-        selected_item = self.tree.selection()  # get selected row(s) from Treeview
+        selected_row = self.table.selected  # store row of the selected table row
         
         # if there is no record left in the table , show the error message
         condition = (
-            "empty_table" if not self.tree.get_children()
-            else "no_selection" if not selected_item
+            "empty_table" if not self.table.keys
+            else "no_selection" if selected_row is None
             else "ok"
     )
 
@@ -417,33 +1208,179 @@ class Expenses_Tracker(ExpenseBase):
             return
 
             # Get values from selected row
-        values = self.tree.item(selected_item, "values")
-        date, category, remarks, amount = values[1], values[2], values[3], float(values[4])
-
-        # Remove from Treeview
-        self.tree.delete(selected_item)
+        expense = self.store.row(selected_row)
+        expense_id, date = expense["id"], expense["date"]
 
-        # Remove from expenses.txt (rewrite file without this line)
-        with open("expenses.txt", "r") as f:
-            lines = f.readlines()
+        # Remove from the table
+        self.table.remove(selected_row)
+        self._shown_rows = self._shown_rows[self._shown_rows != selected_row]
 
-        with open("expenses.txt", "w") as f:
-            for line in lines:
-                if line.strip() != f"{date},{category},{remarks},{amount:.2f}":
-                    f.write(line)
+        # Remove from expenses.txt by appending a tombstone for this row only
+        self.journal.delete(expense_id)
+        self._unindex_expense(expense_id, date)
 
-            # Update totals
-        self.set_total_expense(self.get_total_expense() - amount)
-        if category in self._category_totals:
-            self._category_totals[category] -= amount
-            if self._category_totals[category] < 0:
-                self._category_totals[category] = 0
+        # Update totals from the rows that are left, summed in integer cents like change_month
+        self.load_totals(np.asarray(self.table.keys, dtype=np.int64))
 
         self.expense_var.set(f"Expense: RM{self.get_total_expense():.2f}")
         self.update_chart() 
+        self._refresh_analytics()
               
 
+    # Import a CSV / OFX bank statement, the file is read on a worker thread
+    def import_expenses(self):
+        if self.importer is not None:
+            tk.messagebox.showinfo("Import running", "Please wait until the current statement is imported.")
+            return
+        path = filedialog.askopenfilename(
+            title="Import Statement",
+            filetypes=[("Bank statements", "*.csv *.ofx *.qfx"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        expense_sign = -1
+        if not path.lower().endswith((".ofx", ".qfx")):
+            # a CSV does not say which sign money going out has, ask instead of guessing
+            answer = tk.messagebox.askyesnocancel(
+                "Import Statement",
+                "Are expenses shown as negative amounts in this file (like a bank export)?\n\n"
+                "Yes: negative rows are expenses, positive rows (salary, refunds) are skipped.\n"
+                "No: positive rows are expenses, negative rows are skipped.")
+            if answer is None:
+                return
+            expense_sign = -1 if answer else 1
+
+        # small window with a progress bar, the main window keeps working
+        self.import_window = tk.Toplevel(self.root)
+        self.import_window.title("Importing")
+        self.import_window.transient(self.root)
+        tk.Label(self.import_window, text=os.path.basename(path), font=("Arial", 10)).pack(padx=20, pady=(10, 5))
+        self.import_progress = ttk.Progressbar(self.import_window, length=250, mode="determinate", maximum=1)
+        self.import_progress.pack(padx=20, pady=(0, 15))
+        self.import_window.protocol("WM_DELETE_WINDOW", self.cancel_import)
+
+        self.importer = ExpenseImporter(path, expense_sign)
+        self.importer.start()
+        self._poll_import()
+
+    def _poll_import(self):
+        self.import_job = None
+        try:
+            while True:
+                message = self.importer.messages.get_nowait()
+                match message:
+                    case ("progress", done, total):
+                        self.import_progress["value"] = done / max(total, 1)
+                    case ("done", expenses, skipped):
+                        self.cancel_import()
+                        self._finish_import(expenses, skipped)
+                        return
+                    case ("error", text):
+                        self.cancel_import()
+                        tk.messagebox.showerror("Import failed", f"Cannot read the statement: {text}")
+                        return
+        except queue.Empty:
+            pass
+        self.import_job = self.root.after(100, self._poll_import)
+
+    # stop polling and close the progress window (closing it cancels the import)
+    def cancel_import(self):
+        if self.import_job is not None:
+            self.root.after_cancel(self.import_job)
+            self.import_job = None
+        if self.importer is not None:
+            self.importer.cancel()
+            self.importer = None
+        if self.import_window.winfo_exists():
+            self.import_window.destroy()
+
+    def _finish_import(self, expenses, skipped):
+        # categories past the store limit are imported as Others, checked before anything is written
+        renamed = self.store.fit_categories(expenses)
+
+        # drop rows that are already in the ledger (only the months in the file are checked)
+        months = {tuple(map(int, e["date"].split("-")[:2])) for e in expenses}
+        existing = set()
+        for year, month in months:
+            existing |= self.store.row_keys(self.store.month_rows(year, month))
+        new = [e for e in expenses if ExpenseImporter.key(e) not in existing]
+
+        # one write to the journal, one append to the store, one refresh of table and chart
+        self.journal.append_many(new)
+        first = self.store.append_many(new)
+        for offset, expense in enumerate(new):
+            self._index_expense(expense, first + offset)
+        self.change_month()
+        self._refresh_analytics()
+
+        message = f"Imported {len(new)} expenses, skipped {skipped + len(expenses) - len(new)} rows."
+        if renamed:
+            message += f"\n{renamed} rows had too many new categories and were filed under Others."
+        tk.messagebox.showinfo("Import finished", message)
+
+    # values of one table row, asked for by the table only while the row is on screen
+    def _row_values(self, pos, index):
+        expense = self.store.row(pos)
+        # No. is the order the expense was added in this month
+        row_no = int(np.searchsorted(self._shown_rows, pos)) + 1
+        return (row_no, expense["date"], expense["category"], expense["remarks"], expense["amount"])
+
+    # column sorting for the table, done by NumPy on the store columns
+    def _sort_rows(self, rows, column, descending):
+        return self.store.order(np.asarray(rows, dtype=np.int64), column, descending).tolist()
+
+    # rows of one month, looked up in the store the first time the month is needed
+    def _month_bucket(self, year, month):
+        key = (year, month)
+        if key not in self._month_index:
+            rows = self.store.month_rows(year, month)
+            ids = self.store.ids(rows)
+            self._month_index[key] = dict(zip(ids.tolist(), rows.tolist()))
+        return self._month_index[key]
+
+    # add an expense (already in the journal and the store) to the bucket of its date and the rollups
+    def _index_expense(self, expense, pos):
+        year, month, _ = map(int, expense["date"].split("-"))
+        if (year, month) in self._month_index:
+            self._month_index[(year, month)][expense["id"]] = pos
+        if self.rollup is not None:
+            self.rollup.add(expense)
+        if year not in self.years:
+            self._refresh_years([year])
+
+    # remove an expense from the bucket of its date and the rollups, and mark its store row as deleted
+    def _unindex_expense(self, expense_id, date):
+        year, month, _ = map(int, date.split("-"))
+        pos = self._month_bucket(year, month).pop(expense_id, None)
+        if pos is not None:
+            if self.rollup is not None:
+                self.rollup.remove(self.store.row(pos))
+            self.store.delete(pos)
+        return pos
+
+    # the year combobox offers every year that has expenses, plus this year
+    def _refresh_years(self, years):
+        self.years = sorted(set(self.years) | set(years))
+        self.year_combo.config(values=self.years)
+
+    # window with the multi-year charts, the rollups are built once and then kept up to date
+    def open_analytics(self):
+        if self.rollup is None:
+            self.rollup = ExpenseRollup()
+            self.rollup.build(*self.store.live_columns())
+        if self.analytics is not None and self.analytics.root.winfo_exists():
+            self.analytics.root.lift()
+            return
+        self.analytics = ExpenseAnalytics(tk.Toplevel(self.root), self.rollup, self.store)
+
+    # redraw the analytics window, if it is open, after the expenses changed
+    def _refresh_analytics(self):
+        if self.analytics is not None and self.analytics.root.winfo_exists():
+            self.analytics.refresh()
+
     def return_to_main(self):
+        if self.importer is not None:
+            self.cancel_import()
         for widget in self.root.winfo_children():
             widget.destroy()
 
@@ -4,54 +4,92 @@ from datetime import datetime
 import json
 import os
 import re
+import time
 import webbrowser
+import bisect
+import uuid
+import hashlib
+import shutil
+import queue
+import threading
+from collections import OrderedDict
 from PIL import Image, ImageTk
 
 # ===================================================================
 #                         NOTE CLASSES
 # ===================================================================
 class Note:
+    # __slots__ keeps each note small (no per-object __dict__), which adds up for large notebooks
+    # last modified is kept as a number (seconds since epoch), only formatted when shown
+    __slots__ = ("title", "content", "tags", "category", "modified", "id")
+
     def __init__(self, title, content, tags="", category="Uncategorized"):
-        self.__title = title
-        self.__content = content
-        self.__tags = tags
-        self.__category = category
-        self.__last_modified = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.title = title
+        self.content = content
+        self.tags = tags
+        self.category = category
+        self.modified = time.time()
+        self.id = uuid.uuid4().hex # stable id, also the key in the note store
+
+    def get_id(self):
+        return self.id
+
+    def set_id(self, note_id):
+        self.id = note_id
 
     def get_title(self):
-        return self.__title
+        return self.title
 
     def set_title(self, title):
-        self.__title = title
+        self.title = title
 
     def get_content(self):
-        return self.__content
+        return self.content
 
     def set_content(self, content):
-        self.__content = content
+        self.content = content
 
     def get_tags(self):
-        return self.__tags
+        return self.tags
 
     def set_tags(self, tags):
-        self.__tags = tags
+        self.tags = tags
 
     def get_category(self):
-        return self.__category
+        return self.category
 
     def set_category(self, category):
-        self.__category = category
+        self.category = category
+
+    def get_modified(self):
+        return self.modified
 
     def get_last_modified(self):
-        return self.__last_modified
+        return datetime.fromtimestamp(self.modified).strftime("%Y-%m-%d %H:%M:%S")
 
     def set_last_modified(self):
-        self.__last_modified = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.modified = time.time()
+
+    # compact form used by the note store: a tuple of the fields, content not included
+    def to_record(self):
+        return (self.__class__.__name__, self.id, self.title, self.tags, self.category, self.modified)
+
+    # build a note from a record without going through __init__ (no new id, no clock read)
+    @staticmethod
+    def from_record(record, content=None):
+        cls = ImageNote if record[0] == "ImageNote" else TextNote
+        note = cls.__new__(cls)
+        _, note.id, note.title, note.tags, note.category, note.modified = record[:6]
+        note.content = content
+        if cls is ImageNote:
+            note.image_path, note.image_key = record[6:8]
+        return note
 
     # convert note to dictionary for saving to JSON
     def to_dict(self):
         return {
             "type": self.__class__.__name__,  # automatically saves the class name (e.g., TextNote or ImageNote) so we know the note type when loading
+            "id": self.get_id(),
             "title": self.get_title(),
             "content": self.get_content(),
             "tags": self.get_tags(),
@@ -59,55 +97,680 @@ class Note:
             "last_modified": self.get_last_modified()
     }
 
-    # convert dictionary from JSON back to note
+    # convert dictionary from JSON (notes.json or an older note store) back to note
+    # without "content" (note store index) the content stays None until it is loaded
     @staticmethod
     def from_dict_to_note(data):
-        note_type = data.get("type", "TextNote")
-
-        if note_type == "ImageNote":
-            note = ImageNote(
-                data.get("title", ""),
-                data.get("content", ""),
-                data.get("image_path", ""),
-                data.get("tags", ""),
-                data.get("category", "Uncategorized")
-            )
-        else:
-            note = TextNote(
-                data.get("title", ""),
-                data.get("content", ""),
-                data.get("tags", ""),
-                data.get("category", "Uncategorized")
-            )
-        
-        # set last_modified from saved data instead of using setter, 
-        # so it keeps original time
-        note._Note__last_modified = data.get("last_modified", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        return note
+        try:
+            modified = datetime.strptime(data["last_modified"], "%Y-%m-%d %H:%M:%S").timestamp()
+        except (KeyError, ValueError):
+            modified = time.time()
+
+        record = (data.get("type", "TextNote"), data.get("id") or uuid.uuid4().hex, data.get("title", ""),
+                  data.get("tags", ""), data.get("category", "Uncategorized"), modified,
+                  data.get("image_path", ""), data.get("image_key"))
+        return Note.from_record(record, data.get("content"))
 
 
 class TextNote(Note):
     # no extra fields, just inherits everything from note
-    pass
+    __slots__ = ()
 
 class ImageNote(Note):
     # inherits from note class
-    def __init__(self, title, content, image_path="", tags="", category="Uncategorized"):
+    # image_key names the copy of the image in the attachment store,
+    # None = not imported yet, "" = the original file was missing when it was tried
+    __slots__ = ("image_path", "image_key")
+
+    def __init__(self, title, content, image_path="", tags="", category="Uncategorized", image_key=None):
         super().__init__(title, content, tags, category)
-        self.__image_path = image_path
+        self.image_path = image_path
+        self.image_key = image_key
 
     def get_image_path(self):
-        return self.__image_path
+        return self.image_path
 
     def set_image_path(self, path):
-        self.__image_path = path
+        self.image_path = path
+
+    def get_image_key(self):
+        return self.image_key
+
+    def set_image_key(self, key):
+        self.image_key = key
+
+    def to_record(self):
+        return super().to_record() + (self.image_path, self.image_key)
 
     def to_dict(self):
         data = super().to_dict()
-        data["image_path"] = self.__image_path
+        data["image_path"] = self.image_path
+        data["image_key"] = self.image_key
         return data
 
 
+# ===================================================================
+#                         SEARCH INDEX
+# ===================================================================
+class NoteSearchIndex:
+    # inverted index: word -> {note: score}, words from title, tags and content
+    # title words count more than tags, tags more than content
+    WEIGHTS = (("title", 3), ("tags", 2), ("content", 1))
+    MIN_PREFIX = 2 # shorter query words only match whole words, "a" would expand to most of the vocabulary
+
+    def __init__(self):
+        self.postings = {}   # word -> {note: score}
+        self.words = []      # every word, sorted, so a prefix is a range found with bisect
+        self.note_words = {} # note -> its words, to remove a note without a scan
+
+    @staticmethod
+    def tokenize(text):
+        return re.findall(r"\w+", (text or "").lower())
+
+    # content can be passed in for notes whose content is not loaded
+    def add(self, note, content=None):
+        for word in self._post(note, content):
+            bisect.insort(self.words, word)
+
+    # many notes at once (loading, background indexing): new words are sorted in one go
+    # pairs are (note, content), content None means note.get_content()
+    def add_many(self, pairs):
+        new_words = []
+        for note, content in pairs:
+            new_words.extend(self._post(note, content))
+        if new_words:
+            self.words.extend(new_words)
+            self.words.sort() # two sorted runs after the first sort, merged in linear time
+
+    # put one note in the postings, returns the words that were not indexed before
+    def _post(self, note, content):
+        self.remove(note)
+        scores = {}
+        if content is None:
+            content = note.get_content()
+        fields = {"title": note.get_title(), "tags": note.get_tags(), "content": content}
+        for field, weight in self.WEIGHTS:
+            for word in self.tokenize(fields[field]):
+                scores[word] = scores.get(word, 0) + weight
+
+        new_words = []
+        for word, score in scores.items():
+            if word not in self.postings:
+                self.postings[word] = {}
+                new_words.append(word)
+            self.postings[word][note] = score
+        self.note_words[note] = list(scores)
+        return new_words
+
+    def remove(self, note):
+        for word in self.note_words.pop(note, []):
+            notes = self.postings[word]
+            notes.pop(note, None)
+            if not notes:
+                del self.postings[word]
+                del self.words[bisect.bisect_left(self.words, word)]
+
+    def search(self, query):
+        # every query word must match the start of a word in the note
+        # returns notes ranked by score (best first)
+        ranked = None
+        for term in self.tokenize(query):
+            matches = {}
+            if len(term) < self.MIN_PREFIX:
+                words = [term] if term in self.postings else []
+            else:
+                start = bisect.bisect_left(self.words, term)
+                end = start
+                while end < len(self.words) and self.words[end].startswith(term):
+                    end += 1
+                words = self.words[start:end]
+            for word in words:
+                for note, score in self.postings[word].items():
+                    matches[note] = matches.get(note, 0) + score
+
+            if ranked is None:
+                ranked = matches
+            else:
+                ranked = {note: ranked[note] + score for note, score in matches.items() if note in ranked}
+            if not ranked:
+                return []
+
+        if ranked is None:
+            return []
+        return sorted(ranked, key=ranked.get, reverse=True)
+
+
+# ===================================================================
+#                         SORT INDEX
+# ===================================================================
+class NoteOrderIndex:
+    # kept up to date on every save and delete, so the note list never sorts or scans all notes
+    # orders: sort name -> sorted list of (sort key, note id)
+    # titles: title -> notes with that title (duplicate check)
+    # categories: category -> ids of its notes
+    SORTS = {
+        "Last Modified": lambda note: (-note.get_modified(),), # newest first
+        "Title": lambda note: (note.get_title().lower(),),
+        "Category": lambda note: (note.get_category().lower(), note.get_title().lower()),
+    }
+
+    def __init__(self, notes=()):
+        self.notes = {note.get_id(): note for note in notes}
+        self.orders = {name: sorted((key(note), note.get_id()) for note in self.notes.values())
+                       for name, key in self.SORTS.items()}
+        self.titles = {}
+        self.categories = {}
+        for note in self.notes.values():
+            self.titles.setdefault(note.get_title(), set()).add(note)
+            self.categories.setdefault(note.get_category(), set()).add(note.get_id())
+
+    def add(self, note):
+        self.notes[note.get_id()] = note
+        for name, key in self.SORTS.items():
+            bisect.insort(self.orders[name], (key(note), note.get_id()))
+        self.titles.setdefault(note.get_title(), set()).add(note)
+        self.categories.setdefault(note.get_category(), set()).add(note.get_id())
+
+    def remove(self, note):
+        if self.notes.get(note.get_id()) is not note:
+            return
+        del self.notes[note.get_id()]
+        for name, key in self.SORTS.items():
+            order = self.orders[name]
+            del order[bisect.bisect_left(order, (key(note), note.get_id()))]
+        self.titles[note.get_title()].discard(note)
+        if not self.titles[note.get_title()]:
+            del self.titles[note.get_title()]
+        self.categories[note.get_category()].discard(note.get_id())
+        if not self.categories[note.get_category()]:
+            del self.categories[note.get_category()]
+
+    # is the title used by a note other than this one
+    def title_taken(self, title, note=None):
+        return any(other is not note for other in self.titles.get(title, ()))
+
+    # notes in the chosen order, only one category if given (its bucket is sorted, not every note)
+    def ordered(self, sort, category=None):
+        if category is None:
+            return [self.notes[note_id] for _, note_id in self.orders[sort]]
+        key = self.SORTS[sort]
+        notes = [self.notes[note_id] for note_id in self.categories.get(category, ())]
+        notes.sort(key=lambda note: (key(note), note.get_id()))
+        return notes
+
+
+# ===================================================================
+#                         NOTE STORAGE
+# ===================================================================
+class NoteStore:
+    # notes_store/index.jsonl : one line per save or delete, a save is a JSON array
+    #                           [offset, length, *note record] (where the body is in bodies.dat)
+    # notes_store/bodies.dat  : note contents (utf-8) one after another, only appended
+    # starting up reads the small index, a body is read when the note is opened
+    # files are only appended to or replaced whole (temp file + os.replace), a crash never truncates them
+    # writes come from the NoteWriter thread, reads from Tk, the lock keeps them apart
+    COMPACT_MIN_BYTES = 1024 * 1024
+
+    def __init__(self, folder="notes_store", fsync=False):
+        self.folder = folder
+        self.fsync = fsync # also wait for the disk, not only the OS, before a write counts as done
+        self.lock = threading.RLock()
+        self.index_path = os.path.join(folder, "index.jsonl")
+        self.bodies_path = os.path.join(folder, "bodies.dat")
+        self.entries = {}    # note id -> (offset, length, note record)
+        self.dead_bytes = 0  # bodies that were replaced or deleted
+
+    def exists(self):
+        return os.path.exists(self.index_path)
+
+    # replay the index and return the notes, their content is None until read_body
+    def load(self):
+        self.entries = {}
+        self.dead_bytes = 0
+        with open(self.index_path, "rb") as f:
+            end = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break # half-written last line after a crash
+                end += len(line)
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, list):
+                    note_id = entry[3]
+                    old = self.entries.get(note_id)
+                    self.entries[note_id] = (entry[0], entry[1], tuple(entry[2:]))
+                elif "bodies" in entry: # first line after a compaction
+                    self.bodies_path = os.path.join(self.folder, entry["bodies"])
+                    old = None
+                elif entry.get("deleted"):
+                    old = self.entries.pop(entry["id"], None)
+                else: # saved as a dict by an older version
+                    old = self.entries.get(entry["id"])
+                    self.entries[entry["id"]] = (entry["offset"], entry["length"],
+                                                 Note.from_dict_to_note(entry).to_record())
+                if old:
+                    self.dead_bytes += old[1]
+        if end < os.path.getsize(self.index_path):
+            os.truncate(self.index_path, end) # so the next save starts on a new line
+
+        # bodies files left by a compaction that crashed before its index was swapped in
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name.startswith("bodies") and name.endswith(".dat") and path != self.bodies_path:
+                os.remove(path)
+
+        self.maybe_compact()
+        return [Note.from_record(record) for _, _, record in self.entries.values()]
+
+    def live_bytes(self):
+        return sum(length for _, length, _ in self.entries.values())
+
+    def read_body(self, note_id):
+        with self.lock:
+            offset, length, _ = self.entries[note_id]
+            with open(self.bodies_path, "rb") as f:
+                f.seek(offset)
+                return f.read(length).decode("utf-8")
+
+    # read many bodies with one open file, returns [(note id, content)]
+    def read_bodies(self, note_ids):
+        bodies = []
+        with self.lock, open(self.bodies_path, "rb") as f:
+            for note_id in note_ids:
+                entry = self.entries.get(note_id)
+                if entry is None:
+                    continue # deleted in the meantime
+                f.seek(entry[0])
+                bodies.append((note_id, f.read(entry[1]).decode("utf-8")))
+        return bodies
+
+    def sync(self, f):
+        if self.fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+    # save one note: its body is appended and one index line is added
+    def put(self, note):
+        self.put_many([note])
+
+    def put_many(self, notes):
+        self.write(notes, [])
+
+    def delete(self, note_id):
+        self.write([], [note_id])
+
+    # append the bodies, then the index lines pointing at them (so an index line never points past the end)
+    def write(self, notes, deleted_ids):
+        with self.lock:
+            self.append(notes, deleted_ids)
+
+    def append(self, notes, deleted_ids):
+        os.makedirs(self.folder, exist_ok=True)
+        offset = os.path.getsize(self.bodies_path) if os.path.exists(self.bodies_path) else 0
+        bodies, lines = [], []
+        for note in notes:
+            body = note.get_content().encode("utf-8")
+            record = note.to_record()
+            old = self.entries.get(note.get_id())
+            if old:
+                self.dead_bytes += old[1]
+            self.entries[note.get_id()] = (offset, len(body), record)
+            lines.append(self.index_line(offset, len(body), record))
+            bodies.append(body)
+            offset += len(body)
+
+        for note_id in deleted_ids:
+            old = self.entries.pop(note_id, None)
+            if old:
+                self.dead_bytes += old[1]
+            lines.append(json.dumps({"id": note_id, "deleted": True}) + "\n")
+
+        if bodies:
+            with open(self.bodies_path, "ab") as f:
+                f.write(b"".join(bodies))
+                self.sync(f)
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+            self.sync(f)
+
+    @staticmethod
+    def index_line(offset, length, record):
+        return json.dumps([offset, length, *record], ensure_ascii=True) + "\n"
+
+    def maybe_compact(self):
+        with self.lock:
+            due = self.dead_bytes > max(self.COMPACT_MIN_BYTES, self.live_bytes())
+        if due:
+            self.compact()
+
+    # copy the live bodies to a new bodies file, then swap in an index that names it
+    # replacing the index is the only step that changes anything, so a crash leaves the old or the new pair
+    # the copy runs without the lock (bodies are only appended, so the old file stays valid), reads are
+    # only held up while the notes saved during the copy are added and the index is swapped
+    def compact(self):
+        with self.lock:
+            copied = dict(self.entries)
+            old_path = self.bodies_path
+        entries = {}
+        bodies_path = os.path.join(self.folder, f"bodies.{uuid.uuid4().hex[:8]}.dat")
+        offset = 0
+        with open(bodies_path, "wb") as out, open(old_path, "rb") as f:
+            for note_id, (start, length, record) in copied.items():
+                f.seek(start)
+                out.write(f.read(length))
+                entries[note_id] = (offset, length, record)
+                offset += length
+
+        with self.lock:
+            # notes saved or deleted while copying
+            with open(bodies_path, "ab") as out, open(old_path, "rb") as f:
+                for note_id in [note_id for note_id in entries if note_id not in self.entries]:
+                    del entries[note_id]
+                for note_id, entry in self.entries.items():
+                    if copied.get(note_id) != entry:
+                        f.seek(entry[0])
+                        out.write(f.read(entry[1]))
+                        entries[note_id] = (offset, entry[1], entry[2])
+                        offset += entry[1]
+                self.sync(out)
+            with open(self.index_path + ".tmp", "w", encoding="utf-8") as out:
+                out.write(json.dumps({"bodies": os.path.basename(bodies_path)}) + "\n")
+                out.write("".join(self.index_line(*entry) for entry in entries.values()))
+                self.sync(out)
+            os.replace(self.index_path + ".tmp", self.index_path)
+
+            self.bodies_path = bodies_path
+            self.entries = entries
+            self.dead_bytes = 0
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+
+class NoteWriter:
+    # saves and deletes are queued here and written to the note store on a worker thread
+    # changes within `delay` seconds are written together, a note saved twice in that time is written once
+    # failed writes go to self.errors (read on the Tk thread) and are kept to be tried again
+    # an image note without an image key gets its image copied into the attachment store first
+    # (hashing, copying and making thumbnails), its note goes to self.attached when that is done
+    def __init__(self, store, attachments=None, delay=0.5):
+        self.store = store
+        self.attachments = attachments
+        self.attached = queue.Queue()
+        self.delay = delay
+        self.pending = {}  # note id -> note to save, or None to delete
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.errors = queue.Queue()
+        self.stopped = False
+        threading.Thread(target=self.worker, daemon=True).start()
+
+    def put(self, note):
+        self.queue_change(note.get_id(), note)
+
+    def delete(self, note_id):
+        self.queue_change(note_id, None)
+
+    def queue_change(self, note_id, note):
+        with self.lock:
+            self.pending.pop(note_id, None) # keep the order of the latest change
+            self.pending[note_id] = note
+            self.idle.clear()
+        self.wake.set()
+
+    def busy(self):
+        return not self.idle.is_set()
+
+    # wait until everything queued so far is written (used when the window closes)
+    def flush(self, timeout=5):
+        self.wake.set()
+        return self.idle.wait(timeout)
+
+    # try the changes kept after a failed write again
+    def retry(self):
+        self.wake.set()
+
+    # write what is queued, then let the worker thread end
+    def stop(self, timeout=5):
+        self.stopped = True
+        return self.flush(timeout)
+
+    def worker(self):
+        while True:
+            self.wake.wait()
+            if not self.stopped:
+                time.sleep(self.delay) # let more changes arrive
+            self.wake.clear()
+            with self.lock:
+                batch, self.pending = self.pending, {}
+            if not batch:
+                self.idle.set() # woken by flush with nothing to write
+                if self.stopped:
+                    return
+                continue
+            self.add_images(batch.values())
+            failed = False
+            try:
+                self.store.write([note for note in batch.values() if note is not None],
+                                 [note_id for note_id, note in batch.items() if note is None])
+                self.store.maybe_compact()
+            except Exception as e:
+                failed = True
+                self.errors.put(e)
+                with self.lock:
+                    for note_id, note in batch.items():
+                        self.pending.setdefault(note_id, note) # newer changes win
+            with self.lock:
+                if not self.pending or (failed and self.stopped):
+                    self.idle.set() # after stop() nobody retries, let flush() return
+            if self.stopped and self.idle.is_set():
+                return # changes queued while this batch was written are written first
+
+    def add_images(self, notes):
+        for note in notes:
+            if self.attachments is None or not isinstance(note, ImageNote) or note.get_image_key() is not None:
+                continue
+            try:
+                note.set_image_key(self.attachments.add(note.get_image_path()))
+            except OSError:
+                note.set_image_key("") # file gone, do not look for it again
+            self.attached.put(note)
+
+
+# ===================================================================
+#                         ATTACHMENTS
+# ===================================================================
+class AttachmentStore:
+    # attachments/<ab>/<sha256>.<ext>        : one copy of each image, shared by every note using it
+    # attachments/thumbs/<sha256>_<w>x<h>.png : thumbnails made once when the image is added
+    # a key is "<sha256>.<ext>", its paths are built from the key alone (no searching for files)
+    THUMB_SIZES = ((32, 32), (700, 500)) # note list and image viewer
+
+    def __init__(self, folder="attachments"):
+        self.folder = folder
+
+    # copy an image into the store (once per content) and return its key
+    def add(self, path):
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        ext = os.path.splitext(path)[1].lower() or ".img"
+        key = sha.hexdigest() + ext
+
+        blob = self.path(key)
+        if not os.path.exists(blob): # same content already stored -> nothing to copy
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            shutil.copyfile(path, blob + ".tmp")
+            os.replace(blob + ".tmp", blob)
+            self.make_thumbnails(key)
+        return key
+
+    def path(self, key):
+        return os.path.join(self.folder, key[:2], key)
+
+    def thumb_path(self, key, size):
+        return os.path.join(self.folder, "thumbs", f"{os.path.splitext(key)[0]}_{size[0]}x{size[1]}.png")
+
+    # the key of a path inside the store, None for any other path
+    def key_of(self, path):
+        key = os.path.basename(path)
+        if key and os.path.normpath(path) == os.path.normpath(self.path(key)):
+            return key
+        return None
+
+    def make_thumbnails(self, key):
+        os.makedirs(os.path.join(self.folder, "thumbs"), exist_ok=True)
+        try:
+            with Image.open(self.path(key)) as image:
+                image.load()
+                for size in self.THUMB_SIZES:
+                    thumb = image.copy()
+                    thumb.thumbnail(size)
+                    if thumb.mode not in ("RGB", "RGBA", "L", "P"):
+                        thumb = thumb.convert("RGB") # e.g. CMYK cannot be saved as PNG
+                    thumb.save(self.thumb_path(key, size) + ".tmp", "PNG")
+                    os.replace(self.thumb_path(key, size) + ".tmp", self.thumb_path(key, size))
+        except Exception:
+            pass # not an image PIL can read, the viewer shows the error when it is opened
+
+    # best picture for showing the image at this size: (its thumbnail, True) if one was made,
+    # otherwise (the full image, False)
+    def preview(self, key, size):
+        if size in self.THUMB_SIZES and os.path.exists(self.thumb_path(key, size)):
+            return self.thumb_path(key, size), True
+        return self.path(key), False
+
+
+# ===================================================================
+#                         THUMBNAILS
+# ===================================================================
+class ThumbnailCache:
+    # thumbnails are saved in .thumbnails/ as PNG, named by a hash of
+    # (image path, modified time, file size, thumbnail size) so a changed image gets a new one
+    # thumbnails the attachment store already made are only kept in memory (disk=False), not copied here
+    # images are decoded on a worker thread, results come back to Tk through a queue
+    def __init__(self, root, folder=".thumbnails", max_files=500, max_memory=32 * 1024 * 1024):
+        self.root = root
+        self.folder = folder
+        self.max_files = max_files
+        self.max_memory = max_memory # bytes of decoded pixels kept in memory
+        self.memory_used = 0
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.callbacks = {}          # cache key -> callbacks waiting for it (Tk thread only)
+        self.memory = OrderedDict()  # cache key -> PIL image, most recently used last
+        self.poll_job = None
+        self.stopped = False
+
+        # files on disk, oldest use first (only the worker thread changes it after this)
+        os.makedirs(folder, exist_ok=True)
+        names = sorted(os.listdir(folder), key=lambda n: os.path.getmtime(os.path.join(folder, n)))
+        self.files = OrderedDict((name, None) for name in names if name.endswith(".png"))
+
+        threading.Thread(target=self.worker, daemon=True).start()
+
+    # ask for a thumbnail, callback(image, error) is called later on the Tk thread
+    # disk=False for files that already are thumbnails: read as they are, no copy in .thumbnails/
+    def get(self, path, size, callback, disk=True):
+        if self.stopped:
+            return
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            callback(None, e)
+            return
+        key = hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+                           .encode("utf-8")).hexdigest()
+
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            callback(self.memory[key], None)
+            return
+
+        waiting = self.callbacks.setdefault(key, [])
+        waiting.append(callback)
+        if len(waiting) == 1: # the first request for this key starts the work
+            self.requests.put((key, path, size, disk))
+        if self.poll_job is None:
+            self.poll_job = self.root.after(30, self.poll)
+
+    # the screen is closing: no more callbacks, and the worker thread ends
+    def stop(self):
+        self.stopped = True
+        if self.poll_job is not None:
+            self.root.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.callbacks.clear()
+        self.memory.clear()
+        self.requests.put(None)
+
+    def worker(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return # stop()
+            key, path, size, disk = request
+            cache_path = os.path.join(self.folder, key + ".png")
+            try:
+                if not disk:
+                    image = Image.open(path)
+                    image.thumbnail(size) # already this size when it comes from the attachment store
+                    image.load()
+                elif key + ".png" in self.files:
+                    image = Image.open(cache_path)
+                    image.load()
+                    self.files.move_to_end(key + ".png")
+                    os.utime(cache_path) # keeps the LRU order after a restart
+                else:
+                    image = Image.open(path)
+                    image.thumbnail(size)
+                    if image.mode not in ("RGB", "RGBA", "L", "P"):
+                        image = image.convert("RGB") # e.g. CMYK cannot be saved as PNG
+                    image.save(cache_path + ".tmp", "PNG")
+                    os.replace(cache_path + ".tmp", cache_path)
+                    self.files[key + ".png"] = None
+                    self.evict()
+                self.results.put((key, image, None))
+            except Exception as e:
+                self.results.put((key, None, e))
+
+    # drop the least recently used thumbnails over the limit
+    def evict(self):
+        while len(self.files) > self.max_files:
+            name, _ = self.files.popitem(last=False)
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+    @staticmethod
+    def image_bytes(image):
+        return image.width * image.height * len(image.getbands())
+
+    # hand finished images to their callbacks, keeps polling while work is pending
+    def poll(self):
+        self.poll_job = None
+        while not self.results.empty():
+            key, image, error = self.results.get()
+            if image is not None and key not in self.memory:
+                self.memory[key] = image
+                self.memory_used += self.image_bytes(image)
+                while self.memory_used > self.max_memory and len(self.memory) > 1:
+                    _, old = self.memory.popitem(last=False)
+                    self.memory_used -= self.image_bytes(old)
+            for callback in self.callbacks.pop(key, []):
+                callback(image, error)
+
+        if self.callbacks:
+            self.poll_job = self.root.after(30, self.poll)
+
+
 # ===================================================================
 #                         APP CLASS
 # ===================================================================
@@ -133,12 +796,33 @@ class Note_Organizer:
         root.geometry(f"{app_width}x{app_height}+{x}+{y}")
         
         self.notes = []
+        self.store = NoteStore("notes_store") # per-note storage, contents read on demand
+        self.attachments = AttachmentStore("attachments") # images copied in, named by their hash
+        self.writer = NoteWriter(self.store, self.attachments) # saves, deletes and new images are written in the background
+        self.writer_job = None
+        self.write_failed = False # a save failed, it is tried again from check_writer
+        self.search_index = NoteSearchIndex() # word index over title, tags and content
+        self.order_index = NoteOrderIndex()   # sorted orders, titles and category buckets
+        self.note_positions = {} # note -> its index in self.notes
+        self.visible = []        # (index in self.notes, note) for every row of the note list
+        self.list_slots = []     # the Treeview items, only as many as fit on screen
+        self.list_first = 0      # row in self.visible shown in the first slot
+        self.selected_row = None # row in self.visible that is selected
+        self.row_photos = {}     # note list row -> thumbnail PhotoImage, only rows on screen
+        self.thumb_job = None
+        self.refresh_job = None  # pending debounced refresh
         self.selected_note_index = None
         self.categories = ["Uncategorized"] # default category
 
         self.image_window = None
+        self.thumbnails = ThumbnailCache(root) # decoded viewer images, cached on disk
+        self.hasEnded = False
+        self.dirty_lines = set() # editor lines to scan for links, None = whole note
+        self.link_job = None
+        self.unindexed = [] # notes whose content is not in the search index yet
 
         self.setup_ui()
+        self.destroy_bind = self.root.bind("<Destroy>", self.on_destroy, add="+")
         self.read_file()
 
     # ==============================
@@ -164,7 +848,7 @@ class Note_Organizer:
         ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
         self.search_var = tk.StringVar() # bind to search entry
         ttk.Entry(search_frame, textvariable=self.search_var).pack(fill=tk.X, padx=(5, 0))
-        self.search_var.trace('w', self.refresh_list) # when search_var changes, call refresh_list function
+        self.search_var.trace('w', self.schedule_refresh) # when search_var changes, refresh the list after typing pauses
 
         # Category filter
         filter_frame = ttk.Frame(left)
@@ -175,17 +859,35 @@ class Note_Organizer:
         self.filter_dropdown.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.filter_category_var.trace("w", self.refresh_list)
 
+        # Sort order
+        sort_frame = ttk.Frame(left)
+        sort_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        ttk.Label(sort_frame, text="Sort by:").pack(side=tk.LEFT)
+        self.sort_var = tk.StringVar(value="Last Modified")
+        ttk.OptionMenu(sort_frame, self.sort_var, "Last Modified", *NoteOrderIndex.SORTS).pack(
+            side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.sort_var.trace("w", self.refresh_list)
+
         # Notes list
         listbox_frame = ttk.Frame(left)
         listbox_frame.pack(fill=tk.BOTH, expand=True, padx=5)
 
-        scrollbar = ttk.Scrollbar(listbox_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set, font=('Arial', 10))
-        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.listbox.yview)
-        self.listbox.bind('<<ListboxSelect>>', self.load_note)
+        self.list_scrollbar = ttk.Scrollbar(listbox_frame, command=self.list_yview)
+        self.list_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # a Treeview instead of a Listbox so image notes can show a small thumbnail
+        # it only holds the rows on screen, scrolling puts other notes in them (see render_list)
+        style = ttk.Style()
+        style.configure("NoteList.Treeview", rowheight=self.ROW_HEIGHT, font=('Arial', 10))
+        self.note_list = ttk.Treeview(listbox_frame, show="tree", selectmode="browse", style="NoteList.Treeview")
+        self.note_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.note_list.bind('<<TreeviewSelect>>', self.on_list_select)
+        self.note_list.bind("<Configure>", self.resize_list)
+        self.note_list.bind("<MouseWheel>", lambda e: self.scroll_list(int(-1 * (e.delta / 120))))
+        self.note_list.bind("<Button-4>", lambda e: self.scroll_list(-1)) # mouse wheel on Linux
+        self.note_list.bind("<Button-5>", lambda e: self.scroll_list(1))
+        self.note_list.bind("<Up>", lambda e: self.move_list_selection(-1))
+        self.note_list.bind("<Down>", lambda e: self.move_list_selection(1))
 
         ttk.Button(left, text="New Note", command=self.new_note).pack(fill=tk.X, padx=5, pady=5)
 
@@ -207,8 +909,17 @@ class Note_Organizer:
         ttk.Label(editor, text="Content:").grid(row=1, column=0, sticky=(tk.W, tk.N), pady=2)
         self.content = scrolledtext.ScrolledText(editor, width=50, height=15, wrap=tk.WORD)
         self.content.grid(row=1, column=1, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(10, 0), pady=2)
-        # Detect links when typing
-        self.content.bind("<KeyRelease>", lambda e: self.make_links_clickable(self.content.get("1.0", tk.END)))
+        # Detect links when typing (only the edited lines, once typing pauses)
+        self.content.bind("<KeyRelease>", self.mark_link_lines)
+        self.content.bind("<<Paste>>", lambda e: self.schedule_link_scan(None))
+
+        # one shared tag for every link, the click finds the URL under the mouse
+        self.content.tag_config("link", foreground="blue", underline=1)
+        self.content.tag_bind("link", "<Button-1>", self.open_link)
+        # change cursor to hand when hovering
+        self.content.tag_bind("link", "<Enter>", lambda e: self.content.config(cursor="hand2"))
+        # reset cursor back to text when leaving
+        self.content.tag_bind("link", "<Leave>", lambda e: self.content.config(cursor="xterm"))
 
         # Tags
         ttk.Label(editor, text="Tags:").grid(row=2, column=0, sticky=tk.W, pady=2)
@@ -260,17 +971,31 @@ class Note_Organizer:
     # FILE HANDLING
     # ===================================================================
     
-    # read notes from JSON file
+    # read notes from the note store (only the index, contents are read later)
     def read_file(self):
         try:
-            if os.path.exists("notes.json") and os.path.getsize("notes.json") > 0:
+            if self.store.exists():
+                self.notes = self.store.load()
+
+            elif os.path.exists("notes.json") and os.path.getsize("notes.json") > 0:
+                # first start with the note store: copy notes.json into it once
                 with open("notes.json", "r", encoding="utf-8") as f:
                     data = json.load(f) # load the JSON file
                     self.notes = [Note.from_dict_to_note(note) for note in data]
+                self.store.put_many(self.notes)
             
             else:
                 self.notes = []
+            self.import_attachments()
 
+            # build the search index once, later saves and deletes update it
+            self.search_index = NoteSearchIndex()
+            self.search_index.add_many((note, None) for note in self.notes)
+            self.order_index = NoteOrderIndex(self.notes)
+            self.update_note_positions()
+            # index the contents that are still on disk a few notes at a time
+            self.unindexed = [note for note in self.notes if note.get_content() is None]
+            self.root.after_idle(self.index_contents)
 
             # collect all categories from existing notes 
             category = set(note.get_category() for note in self.notes)
@@ -283,13 +1008,77 @@ class Note_Organizer:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to read notes: {e}")
 
-    # write notes to JSON file
-    def write_notes_to_file(self):
+    # copy images of older notes (stored only as a path) into the attachment store, once
+    # the writer thread copies them and saves the notes, their thumbnails show up when it is done
+    def import_attachments(self):
+        for note in self.notes:
+            if isinstance(note, ImageNote) and note.get_image_key() is None:
+                self.load_content(note) # the writer saves the whole note
+                self.write_note_to_file(note)
+
+    # write one note to the note store (queued, the writer thread saves it shortly after)
+    def write_note_to_file(self, note):
+        self.writer.put(note)
+        self.watch_writer()
+
+    # remove one note from the note store
+    def delete_note_from_file(self, note):
+        self.writer.delete(note.get_id())
+        self.watch_writer()
+
+    # check the writer for errors while it has work, then stop checking
+    def watch_writer(self):
+        if self.writer_job is None:
+            self.writer_job = self.root.after(500, self.check_writer)
+
+    def check_writer(self):
+        self.writer_job = None
+        busy = self.writer.busy() # read first: once it is idle every copied image is in writer.attached
+        self.show_attached()
         try:
-            with open("notes.json", "w", encoding="utf-8") as f:
-                json.dump([note.to_dict() for note in self.notes], f, indent=4, ensure_ascii=True)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save notes: {e}")
+            error = self.writer.errors.get_nowait()
+        except queue.Empty:
+            error = None
+        while not self.writer.errors.empty():
+            self.writer.errors.get_nowait() # one message for a burst of failures
+        if error is not None:
+            if not self.write_failed: # one message until a write works again
+                messagebox.showerror("Error", f"Failed to save notes: {error}\nYour changes are kept, saving is tried again every few seconds.")
+            self.write_failed = True
+            self.writer_job = self.root.after(self.RETRY_MS, self.retry_writes)
+        elif busy:
+            self.watch_writer()
+        else:
+            self.write_failed = False
+
+    RETRY_MS = 5000
+
+    # failed changes stay queued in the writer, wake it up to write them again
+    def retry_writes(self):
+        self.writer_job = None
+        self.writer.retry()
+        self.watch_writer()
+
+    # read contents of not loaded notes into the search index, in small chunks so the window stays responsive
+    def index_contents(self):
+        if self.hasEnded or not self.unindexed:
+            return
+        chunk, self.unindexed = self.unindexed[:200], self.unindexed[200:]
+        notes = {note.get_id(): note for note in chunk}
+        try:
+            bodies = list(self.store.read_bodies(list(notes)))
+        except OSError:
+            return
+        # skip notes replaced or deleted meanwhile
+        self.search_index.add_many((notes[note_id], content) for note_id, content in bodies
+                                   if notes[note_id] in self.note_positions)
+        self.root.after_idle(self.index_contents)
+
+    # make sure the content of a note is loaded (it is read from the store on first use)
+    def load_content(self, note):
+        if note.get_content() is None:
+            note.set_content(self.store.read_body(note.get_id()))
+        return note.get_content()
 
     # ===================================================================
     # CATEGORY MANAGEMENT
@@ -341,13 +1130,24 @@ class Note_Organizer:
             return
 
         # check for duplicate title
-        for i, note in enumerate(self.notes):
-            if note.get_title() == title and i != self.selected_note_index:
-                messagebox.showwarning("Warning", f"Title '{title}' already exists!")
-                return
+        editing = self.notes[self.selected_note_index] if self.selected_note_index is not None else None
+        if self.order_index.title_taken(title, editing):
+            messagebox.showwarning("Warning", f"Title '{title}' already exists!")
+            return
             
         if image_path:
-            new_note = ImageNote(title, content, image_path, tags, category)
+            # the editor shows images already in the attachment store by their stored path
+            old_note = editing
+            image_key = self.attachments.key_of(image_path)
+            if image_key is None and isinstance(old_note, ImageNote) and old_note.get_image_path() == image_path:
+                image_key = old_note.get_image_key() # unchanged missing image, keep it as it was
+            elif image_key is None and not os.path.isfile(image_path):
+                messagebox.showerror("Error", f"Cannot add image: {image_path} is not a file")
+                return
+            # a new image keeps image_key None, the writer thread copies it into the attachment store
+            new_note = ImageNote(title, content, image_path, tags, category, image_key)
+            if image_key is not None and isinstance(old_note, ImageNote) and old_note.get_image_key() == image_key:
+                new_note.set_image_path(old_note.get_image_path()) # keep where it was first added from
         else:
             new_note = TextNote(title, content, tags, category)
 
@@ -360,9 +1160,17 @@ class Note_Organizer:
                 self.categories.append(category)
 
             # replace existing note with changed note
+            old_note = self.notes[self.selected_note_index]
+            self.search_index.remove(old_note)
+            self.order_index.remove(old_note)
+            del self.note_positions[old_note]
+            new_note.set_id(old_note.get_id()) # same note in the store
             self.notes[self.selected_note_index] = new_note
+            self.search_index.add(new_note)
+            self.order_index.add(new_note)
+            self.note_positions[new_note] = self.selected_note_index
 
-            self.write_notes_to_file()
+            self.write_note_to_file(new_note)
             self.update_category_dropdown()
             self.refresh_list()
 
@@ -373,64 +1181,134 @@ class Note_Organizer:
             if category not in self.categories:
                 self.categories.append(category)
             self.notes.append(new_note)
-            self.write_notes_to_file()
+            self.search_index.add(new_note)
+            self.order_index.add(new_note)
+            self.note_positions[new_note] = len(self.notes) - 1
+            self.write_note_to_file(new_note)
             self.update_category_dropdown()
             self.clear_editor()
             self.refresh_list()
             messagebox.showinfo("Success", "Note added successfully!")
         self.new_note()
 
+    # wait until typing pauses, then refresh once for the whole burst of keys
+    def schedule_refresh(self, *args):
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+        if self.thumb_job is not None:
+            self.root.after_cancel(self.thumb_job)
+            self.thumb_job = None # so schedule_thumbnails can start a new pass
+        self.refresh_job = self.root.after(200, self.refresh_list)
+
     # refresh left panel including note list with search filter
+    # the filter runs once here, load_note reuses self.visible
     def refresh_list(self, *args):
-        self.clear_editor()
-        
-        search = self.search_var.get().lower()
-        filter_cat = self.filter_category_var.get()
-        self.listbox.delete(0, tk.END)
-
-        # check if the note matches the search keyword and category
-        # 1. not search - True if search box is empty
-        # 2. any(...) - True if the keyword is found in title or tags
-        for note in self.notes:
-            fields = [note.get_title(), note.get_tags()]
+        self.refresh_job = None
+        visible = [(i, self.notes[i]) for i in self.search_note_indices()]
+        if visible == self.visible:
+            self.schedule_thumbnails() # a pass cancelled by schedule_refresh still has to run
+            return # same notes in the same order, keep the note list (and its selection)
 
-            match_search = (not search or any(search in (field or "").lower() for field in fields))
-            
-            # check if the note matches the selected category
-            # if filter_cat is all, show everything
-            match_category = (filter_cat == "All" or note.get_category() == filter_cat)
+        self.visible = visible
+        self.clear_editor()
+        self.row_photos = {}
+        self.list_first = 0
+        self.selected_row = None
+        self.render_list()
+        self.schedule_thumbnails()
 
-            if match_search and match_category:
-                self.listbox.insert(tk.END, note.get_title())
+    # ===================================================================
+    # NOTE LIST WINDOW
+    # ===================================================================
+    ROW_HEIGHT = 36 # a 32x32 thumbnail and some space
+
+    # as many slots as rows fit in the widget
+    def resize_list(self, event):
+        count = max(1, event.height // self.ROW_HEIGHT)
+        while len(self.list_slots) < count:
+            self.list_slots.append(self.note_list.insert("", tk.END, iid=f"slot{len(self.list_slots)}"))
+        while len(self.list_slots) > count:
+            self.note_list.delete(self.list_slots.pop())
+        self.scroll_list(0)
+
+    # put the rows list_first .. list_first + slots in the slots, costs the same for 10 or 100k notes
+    def render_list(self):
+        shown = self.visible[self.list_first:self.list_first + len(self.list_slots)]
+        selected_slot = None
+        for i, slot in enumerate(self.list_slots):
+            if i < len(shown):
+                row = self.list_first + i
+                self.note_list.move(slot, "", i) # puts back a slot hidden by detach
+                self.note_list.item(slot, text=shown[i][1].get_title(), image=self.row_photos.get(row) or "")
+                if row == self.selected_row:
+                    selected_slot = slot
+            else:
+                self.note_list.detach(slot)
+        self.note_list.selection_set(selected_slot if selected_slot is not None else ())
+
+        total = max(len(self.visible), 1)
+        self.list_scrollbar.set(self.list_first / total, min(1, (self.list_first + len(self.list_slots)) / total))
+
+    def scroll_list(self, rows):
+        self.list_first = max(0, min(self.list_first + rows, len(self.visible) - len(self.list_slots)))
+        self.render_list()
+        self.schedule_thumbnails()
+        return "break"
+
+    # scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+    def list_yview(self, action, value, unit=None):
+        if action == "moveto":
+            self.list_first = int(float(value) * len(self.visible))
+            self.scroll_list(0)
+        else:
+            self.scroll_list(int(value) * (len(self.list_slots) if unit == "pages" else 1))
+
+    def move_list_selection(self, step):
+        if not self.visible:
+            return "break"
+        row = self.selected_row + step if self.selected_row is not None else 0
+        row = max(0, min(row, len(self.visible) - 1))
+        if row < self.list_first:
+            self.list_first = row
+        elif row >= self.list_first + len(self.list_slots):
+            self.list_first = row - len(self.list_slots) + 1
+        self.select_row(row)
+        self.scroll_list(0)
+        return "break"
+
+    def on_list_select(self, event=None):
+        selection = self.note_list.selection()
+        if selection: # an empty selection only means the selected row scrolled away
+            self.select_row(self.list_first + self.list_slots.index(selection[0]))
+
+    def select_row(self, row):
+        if row != self.selected_row and row < len(self.visible):
+            self.selected_row = row
+            self.load_note()
 
     # get matching note indices after searching
+    # with a keyword the notes come from the search index, best match first,
+    # otherwise from the order index in the chosen sort order
     def search_note_indices(self):
-        keyword = self.search_var.get().lower()
+        keyword = self.search_var.get().strip()
         filter_cat = self.filter_category_var.get()
-        
-        matching_indices = []
-
-        for i, note in enumerate(self.notes):
-            fields = [note.get_title(), note.get_tags()]
-            match_search = (not keyword or any(keyword in (field or "").lower() for field in fields))
-            match_category = (filter_cat == "All" or note.get_category() == filter_cat)
+        category = None if filter_cat == "All" else filter_cat
 
-            if match_search and match_category:
-                matching_indices.append(i)
+        if not keyword:
+            return [self.note_positions[note] for note in self.order_index.ordered(self.sort_var.get(), category)]
 
-        return matching_indices
+        # check if the note matches the selected category
+        # if filter_cat is all, show everything
+        bucket = self.order_index.categories.get(category, set())
+        return [self.note_positions[note] for note in self.search_index.search(keyword)
+                if category is None or note.get_id() in bucket]
     
     # load selected note into editor
     def load_note(self, event=None):
-        selected_items = self.listbox.curselection()   
-        if not selected_items:
-            return
-
-        visible_idx = selected_items[0] # index in the visible filtered list
-        mapping = self.search_note_indices() # get the actual indices of notes after filtering
-        if visible_idx >= len(mapping):
+        visible_idx = self.selected_row # index in the visible filtered list
+        if visible_idx is None or visible_idx >= len(self.visible):
             return  # exit if the selected index is out of range
-        i = mapping[visible_idx] # map back to actual index in self.notes
+        i = self.visible[visible_idx][0] # map back to actual index in self.notes (computed by refresh_list)
 
         self.selected_note_index = i
         note = self.notes[i]
@@ -438,9 +1316,10 @@ class Note_Organizer:
         self.title.delete(0, tk.END)
         self.title.insert(0, note.get_title())
 
+        content = self.load_content(note) # read from disk the first time the note is opened
         self.content.delete(1.0, tk.END)
-        self.content.insert(1.0, note.get_content())
-        self.make_links_clickable(note.get_content())
+        self.content.insert(1.0, content)
+        self.make_links_clickable(content)
 
         self.tags.delete(0, tk.END)
         self.tags.insert(0, note.get_tags())
@@ -449,12 +1328,21 @@ class Note_Organizer:
 
         if isinstance(note, ImageNote):
             self.image_entry.delete(0, tk.END)
-            self.image_entry.insert(0, note.get_image_path())
+            self.image_entry.insert(0, self.image_location(note))
         else:
             self.image_entry.delete(0, tk.END)
 
         self.last_modified_label.config(text=f"Last Modified: {note.get_last_modified()}")
 
+    # where the image of a note is: its copy in the attachment store if it has one
+    def image_location(self, note):
+        if note.get_image_key():
+            return self.attachments.path(note.get_image_key())
+        return note.get_image_path()
+
+    def update_note_positions(self):
+        self.note_positions = {note: i for i, note in enumerate(self.notes)}
+
     def new_note(self):
         self.selected_note_index = None
         self.clear_editor()
@@ -471,10 +1359,14 @@ class Note_Organizer:
         
     def delete_note(self):
         if self.selected_note_index is not None:
-            title = self.notes[self.selected_note_index].get_title()
+            note = self.notes[self.selected_note_index]
+            title = note.get_title()
+            self.search_index.remove(note)
+            self.order_index.remove(note)
             del self.notes[self.selected_note_index]
+            self.update_note_positions() # later notes moved up by one
             self.selected_note_index = None
-            self.write_notes_to_file()
+            self.delete_note_from_file(note)
             self.clear_editor()
             self.refresh_list()
             messagebox.showinfo("Success", f"Note deleted: {title}")
@@ -483,31 +1375,100 @@ class Note_Organizer:
     # LINK HANDLING
     # ===================================================================
     
-    # detect URL and make them clickable
-    def make_links_clickable(self, content_text):
-        for tag in self.content.tag_names():
-            if tag.startswith("link_"):
-                self.content.tag_delete(tag)
+    URL_PATTERN = re.compile(r"https?://[^\s)>\]}\"']+")
 
-        url_pattern = r"https?://[^\s)>\]}\"']+"
+    # detect URL and make them clickable (whole note, used when a note is loaded)
+    def make_links_clickable(self, content_text):
+        self.content.tag_remove("link", "1.0", tk.END)
 
         # finditer returns the place where the pattern matches
-        for m in re.finditer(url_pattern, content_text):
-            start_idx = f"1.0+{m.start()}c" # start position of the URL in Text widget (Tkinter needs "line.char" format)
-            end_idx = f"1.0+{m.end()}c" # end position of the URL
-            tag = f"link_{m.start()}" # unique tag for each link
+        for m in self.URL_PATTERN.finditer(content_text):
+            # position of the URL in Text widget (Tkinter needs "line.char" format)
+            self.content.tag_add("link", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
+
+    # remember the lines around the cursor, Enter/Backspace can split or join them
+    def mark_link_lines(self, event=None):
+        line = int(self.content.index(tk.INSERT).split(".")[0])
+        self.schedule_link_scan({line - 1, line, line + 1})
+
+    def schedule_link_scan(self, lines):
+        if lines is None or self.dirty_lines is None:
+            self.dirty_lines = None # paste: scan everything once
+        else:
+            self.dirty_lines |= lines
+        if self.link_job is None:
+            self.link_job = self.root.after(150, self.scan_link_lines)
+
+    # rescan only the marked lines (a URL never spans two lines)
+    def scan_link_lines(self):
+        self.link_job = None
+        lines, self.dirty_lines = self.dirty_lines, set()
+        if lines is None:
+            self.make_links_clickable(self.content.get("1.0", tk.END))
+            return
 
-            self.content.tag_add(tag, start_idx, end_idx)
+        last_line = int(self.content.index("end-1c").split(".")[0])
+        for line in lines:
+            if 1 <= line <= last_line:
+                self.content.tag_remove("link", f"{line}.0", f"{line}.end")
+                for m in self.URL_PATTERN.finditer(self.content.get(f"{line}.0", f"{line}.end")):
+                    self.content.tag_add("link", f"{line}.{m.start()}", f"{line}.{m.end()}")
 
-            self.content.tag_config(tag, foreground="blue", underline=1)
-            url = m.group() 
+    # open the URL when clicked, found from the link tag range under the mouse
+    def open_link(self, event):
+        index = self.content.index(f"@{event.x},{event.y}")
+        link_range = self.content.tag_prevrange("link", f"{index}+1c")
+        if link_range:
+            webbrowser.open(self.content.get(*link_range))
 
-            # open the URL when clicked
-            self.content.tag_bind(tag, "<Button-1>", lambda e, u=url: webbrowser.open(u))
-            # change cursor to hand when hovering
-            self.content.tag_bind(tag, "<Enter>", lambda e: self.content.config(cursor="hand2"))
-            # reset cursor back to text when leaving
-            self.content.tag_bind(tag, "<Leave>", lambda e: self.content.config(cursor="xterm"))
+    # ===================================================================
+    # NOTE LIST THUMBNAILS
+    # ===================================================================
+    THUMB_SIZE = (32, 32)
+
+    def schedule_thumbnails(self):
+        if self.thumb_job is None:
+            self.thumb_job = self.root.after(50, self.update_thumbnails)
+
+    # only rows in view get a thumbnail, rows that scrolled away give theirs back
+    def update_thumbnails(self):
+        self.thumb_job = None
+        if not self.visible:
+            return
+        # the rows in the slots (nothing before or after them is shown)
+        start = self.list_first
+        end = min(len(self.visible), start + len(self.list_slots))
+
+        for row in [row for row in self.row_photos if not start <= row < end]:
+            del self.row_photos[row] # render_list already gave its slot to another row
+
+        for row in range(start, end):
+            note = self.visible[row][1]
+            if row in self.row_photos or not isinstance(note, ImageNote) or not note.get_image_key():
+                continue
+            self.row_photos[row] = None # requested
+            path, ready = self.attachments.preview(note.get_image_key(), self.THUMB_SIZE)
+            self.thumbnails.get(path, self.THUMB_SIZE,
+                                lambda img, error, row=row, note=note: self.show_thumbnail(row, note, img), disk=not ready)
+
+    # notes whose image the writer thread has just copied in can show their thumbnail now
+    def show_attached(self):
+        attached = False
+        while not self.writer.attached.empty():
+            self.writer.attached.get_nowait()
+            attached = True
+        if attached:
+            self.schedule_thumbnails()
+
+    def show_thumbnail(self, row, note, img):
+        # ignore results for rows that scrolled away or now show another note
+        if self.hasEnded or img is None or row not in self.row_photos or row >= len(self.visible) or self.visible[row][1] is not note:
+            return
+        if not self.list_first <= row < self.list_first + len(self.list_slots):
+            return # scrolled away, update_thumbnails has not dropped it yet
+        photo = ImageTk.PhotoImage(img)
+        self.row_photos[row] = photo # keep a reference to avoid garbage collection
+        self.note_list.item(self.list_slots[row - self.list_first], image=photo)
 
     # ===================================================================
     # IMAGE FILE PICKER
@@ -537,29 +1498,57 @@ class Note_Organizer:
             messagebox.showerror("Error", "Invalid image path!")
             return
 
-        try:
-            # create new window
-            self.image_window = tk.Toplevel(self.root)
-            self.image_window.title("Image Viewer")
-
-            self.image_window.grab_set() # make the window modal
-            self.image_window.transient(self.root) 
-            img = Image.open(filepath)
-            img.thumbnail((700, 500))  
+        # create new window
+        self.image_window = tk.Toplevel(self.root)
+        self.image_window.title("Image Viewer")
+
+        self.image_window.grab_set() # make the window modal
+        self.image_window.transient(self.root) 
+
+        # the image is decoded on a worker thread (or read from the thumbnail cache)
+        lbl = tk.Label(self.image_window, text="Loading image...", width=40, height=10)
+        lbl.pack() # display image
+        ttk.Button(self.image_window, text="Close", command=self.image_window.destroy).pack(pady=10)
+
+        window = self.image_window
+        def show(img, error):
+            if not window.winfo_exists():
+                return # viewer closed before the image was ready
+            if error is not None:
+                window.destroy()
+                messagebox.showerror("Error", f"Cannot open image: {error}")
+                return
             photo = ImageTk.PhotoImage(img)
-
-            lbl = tk.Label(self.image_window, image=photo)
+            lbl.config(image=photo, text="", width=0, height=0)
             lbl.image = photo # keep a reference to avoid garbage collection
-            lbl.pack() # display image
 
-            ttk.Button(self.image_window, text="Close", command=self.image_window.destroy).pack(pady=10)
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Cannot open image: {e}")
+        # images from the attachment store are shown from their ready-made thumbnail
+        image_key = self.attachments.key_of(filepath)
+        ready = False
+        if image_key is not None:
+            filepath, ready = self.attachments.preview(image_key, (700, 500))
+        self.thumbnails.get(filepath, (700, 500), show, disk=not ready)
 
     # ===================================================================
-    def return_to_main(self):
+    # window closed: write what is still queued before the app moves on
+    def on_destroy(self, event):
+        if event.widget is self.root:
+            self.stop()
+
+    # stop every job and worker thread of this screen, what is queued is written first
+    def stop(self):
         self.hasEnded = True
+        for job in (self.refresh_job, self.link_job, self.thumb_job, self.writer_job):
+            if job is not None:
+                self.root.after_cancel(job)
+        self.refresh_job = self.link_job = self.thumb_job = self.writer_job = None
+        self.thumbnails.stop()
+        self.row_photos = {}
+        self.writer.stop() # the next Note Organizer reads the store again
+
+    def return_to_main(self):
+        self.stop()
+        self.root.unbind("<Destroy>", self.destroy_bind) # the root outlives this screen
         for widget in self.root.winfo_children():
             widget.destroy()
 
@@ -1,9 +1,13 @@
 from tkinter import *
+from tkinter import font
 from datetime import datetime
 import winsound
 from tkinter import messagebox
 import json
 import os
+import bisect
+import math
+import time
 
 
 class BaseTimer:
@@ -18,6 +22,8 @@ class BaseTimer:
         self._minutes = None
         self._seconds = None
         self._running = False
+        self._deadline = None   # time.monotonic() when the running countdown reaches zero
+        self._remaining = None  # exact seconds left when paused
         self._break_time = False
         self._mode = "Work Session"
         self._title = "pomodoro timer"
@@ -29,12 +35,215 @@ class BaseTimer:
     def is_time_zero(self):
         return self._hours.get() == 0 and self._minutes.get() == 0 and self._seconds.get() == 0
 
+    def total_seconds(self):
+        return self._hours.get() * 3600 + self._minutes.get() * 60 + self._seconds.get()
+
+    def set_remaining(self, seconds):
+        """Show seconds left, rounded up so 00:00:00 only appears at the deadline."""
+        whole = max(0, math.ceil(seconds))
+        self._hours.set(whole // 3600)
+        self._minutes.set(whole // 60 % 60)
+        self._seconds.set(whole % 60)
+
+
+class SessionLog:
+    """Append-only file of Pomodoro records, one JSON object per line.
+
+    Record line: {"key": <ISO timestamp>, "date": ..., "time": ..., "countdown": ..., "complete": ...}
+    Delete line: {"key": <ISO timestamp>, "deleted": true}
+    Recording a session is one short append. When deleted or replaced lines
+    outnumber the live ones the file is rewritten with only the live records.
+    A Records.txt from older versions (one indented JSON dict) is read and
+    converted on the first load.
+    """
+
+    def __init__(self, path='Records.txt', compact_after=100):
+        self.path = path
+        self.compact_after = compact_after  # dead lines always allowed before compacting
+        self._dead_lines = 0
+
+    def load(self):
+        """Replay the file and return {ISO timestamp: record} in file order."""
+        records = {}
+        self._dead_lines = 0
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path, 'rb') as f:
+            first = f.readline()
+            if first.strip() in (b'{', b'{}'):  # old format: the whole dict as one JSON document
+                f.seek(0)
+                records = json.loads(f.read().decode('utf-8'))
+                f.close()
+                self.compact(records)
+                return records
+
+            f.seek(0)
+            end = 0
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # half-written last line after a crash
+                end += len(line)
+                try:
+                    entry = json.loads(line)
+                    key = entry.pop('key')
+                except (ValueError, KeyError, AttributeError):
+                    self._dead_lines += 1
+                    continue
+                if key in records:
+                    del records[key]
+                    self._dead_lines += 1
+                if entry.get('deleted'):
+                    self._dead_lines += 1
+                else:
+                    records[key] = entry
+
+        if end < os.path.getsize(self.path):
+            os.truncate(self.path, end)  # so the next append starts on a new line
+        self.maybe_compact(records)
+        return records
+
+    def append(self, key, record):
+        self._write({'key': key, **record})
+
+    def delete(self, key, records):
+        """Log the delete of key, records is the dict after the delete (used when compacting)."""
+        self._write({'key': key, 'deleted': True})
+        self._dead_lines += 2  # the record and this line
+        self.maybe_compact(records)
+
+    def maybe_compact(self, records):
+        if self._dead_lines > max(self.compact_after, len(records)):
+            self.compact(records)
+
+    def compact(self, records):
+        """Rewrite the file with only the live records (temp file, then swapped in)."""
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps({'key': key, **record}, ensure_ascii=False) + '\n'
+                            for key, record in records.items()))
+        os.replace(self.path + '.tmp', self.path)
+        self._dead_lines = 0
+
+    def _write(self, entry):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+class RecordTable:
+    """Canvas that only draws the record rows in view.
+
+    Each visible row is a fixed set of canvas items that get new text when the
+    table scrolls, so drawing costs the same for 10 or 50,000 records. keys are
+    kept sorted, fetch(key) gives the four values of a row and on_delete(key) is
+    called when its Delete cell is clicked.
+    """
+
+    def __init__(self, master, widths, height, fetch, on_delete):
+        self.row_height = font.nametofont("TkDefaultFont").metrics("linespace") + 6
+        self.rows = max(1, height // self.row_height)
+        self.canvas = Canvas(master, width=sum(widths), height=self.rows * self.row_height, highlightthickness=0)
+        self.scrollbar = Scrollbar(master, orient=VERTICAL, command=self.yview, cursor="fleur")
+        self.fetch = fetch
+        self.on_delete = on_delete
+        self.keys = []
+        self.first = 0  # index in self.keys of the top visible row
+
+        # (rectangles, texts) of every row slot, the last cell is the Delete button
+        self.slots = []
+        for row in range(self.rows):
+            top = row * self.row_height
+            rects, texts, x = [], [], 0
+            for col, width in enumerate(widths):
+                delete_cell = col == len(widths) - 1
+                tag = f"delete{row}" if delete_cell else ""
+                rects.append(self.canvas.create_rectangle(x, top, x + width - 1, top + self.row_height - 1,
+                                                          fill="#e0e0e0" if delete_cell else "", tags=tag))
+                texts.append(self.canvas.create_text(x + width // 2, top + self.row_height // 2, text="",
+                                                     font=("Arial", 8) if delete_cell else None, tags=tag))
+                x += width
+            self.canvas.tag_bind(f"delete{row}", "<Button-1>", lambda e, row=row: self._on_delete(row))
+            self.slots.append((rects, texts))
+
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll(int(-1 * (e.delta / 120))))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll(-1))  # mouse wheel on Linux
+        self.canvas.bind("<Button-5>", lambda e: self.scroll(1))
+
+    def set_rows(self, keys):
+        self.keys = sorted(keys)
+        self.first = 0
+        self.render()
+
+    # a new row: only rows from it to the bottom of the view are redrawn
+    def add(self, key):
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        if index < self.first:
+            self.first += 1  # added above the view, keep showing the same rows
+            self.update_scrollbar()
+        else:
+            self.render(index - self.first)
+
+    def remove(self, key):
+        index = bisect.bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return
+        del self.keys[index]
+        if index < self.first:
+            self.first -= 1
+            self.update_scrollbar()
+        elif self.first > 0 and self.first + self.rows > len(self.keys):
+            self.scroll(-1)  # at the end of the list, pull the rows above into view
+        else:
+            self.render(index - self.first)
+
+    def scroll(self, rows):
+        self.first = max(0, min(self.first + rows, len(self.keys) - self.rows))
+        self.render()
+        return "break"
+
+    def yview(self, action, value, unit=None):
+        # scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+        if action == "moveto":
+            self.first = int(float(value) * len(self.keys))
+            self.scroll(0)
+        else:
+            self.scroll(int(value) * (self.rows if unit == "pages" else 1))
+
+    # redraw the row slots from start_slot down
+    def render(self, start_slot=0):
+        for slot in range(max(0, start_slot), self.rows):
+            rects, texts = self.slots[slot]
+            index = self.first + slot
+            if index < len(self.keys):
+                values = list(self.fetch(self.keys[index])) + ["Delete"]
+                for rect, text, value in zip(rects, texts, values):
+                    self.canvas.itemconfig(rect, state=NORMAL)
+                    self.canvas.itemconfig(text, state=NORMAL, text=value)
+            else:
+                for item in rects + texts:
+                    self.canvas.itemconfig(item, state=HIDDEN)
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        # the scrollbar is only shown when there are more rows than fit
+        if len(self.keys) <= self.rows:
+            self.scrollbar.pack_forget()
+        elif not self.scrollbar.winfo_ismapped():
+            self.scrollbar.pack(side=RIGHT, fill=Y, before=self.canvas)
+        total = max(len(self.keys), 1)
+        self.scrollbar.set(self.first / total, min(1, (self.first + self.rows) / total))
+
+    def _on_delete(self, slot):
+        if self.first + slot < len(self.keys):
+            self.on_delete(self.keys[self.first + slot])
+
 
 class Pomodoro_Timer(BaseTimer):
     def __init__(self, master=None, filepath='Records.txt'):
         # initialize file/records first
         self._filepath = filepath
-        self._records = {}
+        self._log = SessionLog(filepath)
+        self._records = {}  # ISO timestamp -> record, kept in step with the log
         self._load()
         # initialize base timer state (hours/minutes/seconds, defaults)
         super().__init__()
@@ -185,61 +394,9 @@ class Pomodoro_Timer(BaseTimer):
         header_frame.pack(fill='x')
         self.table_header = header_frame
 
-        # canvas + scrollbar for rows
-        canvas_holder = Frame(table_container)
-        canvas_holder.pack(fill=BOTH, expand=True)
-        canvas = Canvas(canvas_holder, height=200)
-        vsb = Scrollbar(canvas_holder, orient=VERTICAL, command=canvas.yview, cursor="fleur")
-        canvas.configure(yscrollcommand=vsb.set)
-        vsb.pack(side=RIGHT, fill=Y)
-        canvas.pack(side=LEFT, fill=BOTH, expand=True)
-
-        inner = Frame(canvas)
-        canvas.create_window((0, 0), window=inner, anchor='nw')
-
-        # mouse wheel support (Windows)
-        def _on_mousewheel(event, c=canvas):
-            c.yview_scroll(int(-1 * (event.delta / 120)), 'units')
-
-        # keep scrollregion update and show/hide scrollbar depending on content height
-        def _on_frame_config(event, c=canvas, v=vsb, inner_f=inner):
-            c.configure(scrollregion=c.bbox('all'))
-            try:
-                inner_h = inner_f.winfo_reqheight()
-                canvas_h = c.winfo_height()
-            except Exception:
-                inner_h = 0
-                canvas_h = 0
-
-            # if inner content height is less than or equal to canvas height,
-            # hide the scrollbar and prevent scrolling
-            if inner_h <= max(1, canvas_h):
-                # hide scrollbar if shown
-                try:
-                    v.pack_forget()
-                except Exception:
-                    pass
-                # reset view to top
-                try:
-                    c.yview_moveto(0)
-                except Exception:
-                    pass
-                # unbind global mousewheel to avoid scrolling other widgets
-                try:
-                    c.unbind_all('<MouseWheel>')
-                except Exception:
-                    pass
-            else:
-                # ensure scrollbar is visible
-                if not v.winfo_ismapped():
-                    v.pack(side=RIGHT, fill=Y)
-                # bind mouse wheel for scrolling
-                c.bind_all('<MouseWheel>', _on_mousewheel)
-
-        inner.bind('<Configure>', _on_frame_config)
-
-        self.table_canvas = canvas
-        self.table_inner = inner
+        # rows are drawn on a canvas, only the ones in view (see RecordTable)
+        self.table_holder = Frame(table_container)
+        self.table_holder.pack(fill=BOTH, expand=True)
         self.create_table()
 
     
@@ -369,60 +526,53 @@ class Pomodoro_Timer(BaseTimer):
         self.update_timer()
 
     def countdown(self):
+        # the time left always comes from the monotonic deadline, so a late tick
+        # (busy Tk, a dialog, the process suspended) never makes the session longer
         if not self._running:
             return # to stop execution if it is not running
 
-        min = self._minutes.get()
-        hours = self._hours.get()
-        sec = self._seconds.get()
+        remaining = self._deadline - time.monotonic()
 
-        if hours == 0 and min == 0 and sec == 0:
+        if remaining <= 0:
             self._running = False
+            self._deadline = None
+            self._remaining = None
+            self.set_remaining(0)
+            self.update_timer()
             self.start_btn.config(state=NORMAL)
             self.pause_btn.config(state=DISABLED)
             self.minute_entry.config(state=NORMAL)
             self.hour_entry.config(state=NORMAL)
             if self._mode == "Work Session":
+                # record the work session as completed before switching to break
+                # (before the message box, so the record has the real end time)
+                if hasattr(self, '_countdown_time'):
+                    self.add_record(self._countdown_time, True)
+                    self._completed = True
                 info = "Times Up!\n Working session end!\nTime to have a break!"
-                messagebox.showinfo("Times Up!", info)
                 try:
                     winsound.Beep()
                 except Exception:
                     pass
-                # record the work session as completed before switching to break
-                if hasattr(self, '_countdown_time'):
-                    self.add_record(self._countdown_time, True)
-                    self._completed = True
+                messagebox.showinfo("Times Up!", info)
                 self._break()
             
             else:
                 info2 = "Times Up! Break session end!\nTime to Work!"
-                messagebox.showinfo("Times Up!", info2)
                 try:
                     winsound.Beep()
                 except Exception:
                     pass
+                messagebox.showinfo("Times Up!", info2)
                 self._work()
 
             return # return the state of the button commands(function)
         
-        # count down formula for time
-        if sec > 0:
-            sec -= 1
-        elif min > 0:
-            min -= 1
-            sec = 59
-        elif hours > 0:
-            hours -= 1
-            min = 59
-            sec = 59
-
-        self._seconds.set(sec)
-        self._minutes.set(min)
-        self._hours.set(hours)
+        self.set_remaining(remaining)
         self.update_timer()
-        if self._running:
-            self.timer_id = self.window.after(1000, self.countdown)
+        # next tick just after the display changes to the next second
+        until_next = remaining - math.floor(remaining) or 1
+        self.timer_id = self.window.after(int(until_next * 1000) + 5, self.countdown)
 
     def start_timer(self):
         if not self._running:
@@ -463,6 +613,12 @@ class Pomodoro_Timer(BaseTimer):
         # save validated values
         self._hours.set(hours)
         self._minutes.set(minutes)
+        # resuming after a pause keeps the fraction of a second that was left
+        if self._remaining is not None and math.ceil(self._remaining) == self.total_seconds():
+            self._deadline = time.monotonic() + self._remaining
+        else:
+            self._deadline = time.monotonic() + self.total_seconds()
+        self._remaining = None
         # only store the countdown snapshot for work sessions so break start
         # doesn't overwrite it when break auto-starts
         if getattr(self, '_mode', 'Work Session') == "Work Session":
@@ -476,6 +632,9 @@ class Pomodoro_Timer(BaseTimer):
     def pause_timer(self):
         if self._running:
             self._running = False
+            self._remaining = max(0, self._deadline - time.monotonic())
+            self.set_remaining(self._remaining)
+            self.update_timer()
             self.pause_btn.config(state=DISABLED)
             self.start_btn.config(state=NORMAL)
             self.hour_entry.config(state=DISABLED)
@@ -494,6 +653,9 @@ class Pomodoro_Timer(BaseTimer):
         # an accidental record for a break reset
         prev_mode = self._mode
         self.pause_timer()
+        # start() must begin a full session, not carry on from the paused time
+        self._deadline = None
+        self._remaining = None
         self._hours.set(self._default_hours)
         self._minutes.set(self._default_minutes)
         self._seconds.set(0)
@@ -517,38 +679,26 @@ class Pomodoro_Timer(BaseTimer):
         if not isinstance(self._records, dict):
             self._records = {}
         self._records_dict = self._records
-    # draw header + rows from loaded records
-        self.refresh_table()
-
-    def refresh_table(self):
-        # Clear header and inner frames
-        for widget in self.table_header.winfo_children():
-            widget.destroy()
-        for widget in self.table_inner.winfo_children():
-            widget.destroy()
 
-        # Recreate header (fixed)
+        # header (fixed), the row cells use the same column widths
         header = ["Date", "Time", "Countdown", "Completion", ""]
+        widths = []
         for col, text in enumerate(header):
             label = Label(self.table_header, text=text, relief="solid", width=16, bg="yellow")
             label.grid(row=0, column=col, sticky="nsew")
+            widths.append(label.winfo_reqwidth())
 
-        # Recreate rows inside scrollable inner frame
-        for row, (key, record) in enumerate(self._records_dict.items(), start=0):
-            values = [record['date'], record['time'], record['countdown'],
-                      "Completed" if record['complete'] else "Incomplete"]
-            for col, val in enumerate(values):
-                label = Label(self.table_inner, text=val, relief="solid", width=16)
-                label.grid(row=row, column=col, sticky="nsew", padx=0, pady=0)
-
-            dlt_btn = Button(self.table_inner, text="Delete", font=("Arial", 8), width=18,
-                            cursor="hand2", command=lambda k=key: self.delete_record(k))
-            dlt_btn.grid(row=row, column=len(values), sticky="nsew", padx=0, pady=0)
-        # ensure canvas/layout updated so scrollbar visibility is recalculated
-        try:
-            self.table_canvas.update_idletasks()
-        except Exception:
-            pass
+        self.table = RecordTable(self.table_holder, widths, 200, self.record_values, self.delete_record)
+        self.table.canvas.pack(side=LEFT, fill=BOTH, expand=True)
+        self.refresh_table()
+
+    def refresh_table(self):
+        self.table.set_rows(self._records_dict)
+
+    def record_values(self, key):
+        record = self._records_dict[key]
+        return [record['date'], record['time'], record['countdown'],
+                "Completed" if record['complete'] else "Incomplete"]
 
     def add_record(self, countdown_time, complete):
         # don't add records for break sessions
@@ -564,18 +714,19 @@ class Pomodoro_Timer(BaseTimer):
             'countdown': countdown_time,
             'complete': bool(complete)
         }
-        self.refresh_table()
-        self._save()
+        self.table.add(key)
+        self._save(key)
 
     def delete_record(self, key):
-        if key in self._records_dict:
-            del self._records_dict[key]
-        self.refresh_table()
+        if key not in self._records_dict:
+            return
+        del self._records_dict[key]
+        self.table.remove(key)
         # persist changes to disk
         try:
-            self._save()
+            self._log.delete(key, self._records_dict)
         except Exception:
-            pass
+            print('Failed to save records')
 
     def skip(self):
         if self._mode == "Work Session":
@@ -615,21 +766,18 @@ class Pomodoro_Timer(BaseTimer):
         self.text_label.config(text=self._mode)
         self.update_timer()
 
-    def _save(self): # save dictionary into txt file
+    def _save(self, key): # append one record to the session log
         try:
-            with open(self._filepath, 'w', encoding='utf-8') as f:
-                json.dump(self._records, f, indent=2, ensure_ascii=False)
+            self._log.append(key, self._records[key])
         except Exception:
             print('Failed to save records')
 
     def _load(self): #display rhe data in txt file
-        if os.path.exists(self._filepath):
-            try:
-                with open(self._filepath, 'r', encoding='utf-8') as f:
-                    self._records = json.load(f)
-            except Exception:
-                print('Failed to load records')
-                self._records = {}
+        try:
+            self._records = self._log.load()
+        except Exception:
+            print('Failed to load records')
+            self._records = {}
 
     def return_to_main(self):
         self.hasEnded = True
@@ -1,8 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
-from datetime import datetime
+from datetime import datetime, timedelta
 import threading
+import heapq
+import itertools
+import queue
+import bisect
+import uuid
 import json
 import os
 import winsound
@@ -12,6 +17,9 @@ import time
 class Simple_Reminder_App:
     """Main reminder application GUI and logic."""
 
+    ALERT_POLL_MS = 250  # how often the Tk thread looks for due reminders
+    MAX_POPUPS = 3  # more reminders due at once are shown in one list
+
     def __init__(self, root):
         self.root = root
         self.root.title("Simple Reminder App")
@@ -37,7 +45,7 @@ class Simple_Reminder_App:
         self.manager = ReminderManager()
         self.manager.load_reminders()
 
-        self.edit_index = None  # Tracks which reminder is being edited
+        self.edit_id = None  # id of the reminder being edited
 
         # style for table
         style = ttk.Style()
@@ -135,11 +143,11 @@ class Simple_Reminder_App:
                   command=self.clear_form).grid(row=2, column=1, padx=5, pady=10)
 
         # reminder table
-        columns = ("Title", "Date", "Time", "Repeat", "Days")
+        columns = ("Title", "Date", "Time", "Repeat", "Days", "Next")
         self.tree = ttk.Treeview(root, columns=columns, show="headings", height=12, style="Treeview")
         for col in columns:
             self.tree.heading(col, text=col)
-            self.tree.column(col, width=150, anchor="center", stretch=True)
+            self.tree.column(col, width=125, anchor="center", stretch=True)
         self.tree.pack(fill="both", expand=True, padx=10, pady=10)
 
         # Row styling
@@ -156,12 +164,24 @@ class Simple_Reminder_App:
                   command=self.delete_reminder).grid(row=0, column=1, padx=5)
         tk.Button(table_btn_frame, text="Clear All", bg="#95a5a6", fg="white", width=15,
                   command=self.clear_all).grid(row=0, column=2, padx=5)
+        tk.Button(table_btn_frame, text="Agenda", bg="#3498db", fg="white", width=15,
+                  command=self.open_agenda).grid(row=0, column=3, padx=5)
 
         # Load saved reminders into table
         self.refresh_list()
 
-        # Start background thread to check reminders
-        threading.Thread(target=self.check_reminders, daemon=True).start()
+        # Start the scheduler thread, it sleeps until the next reminder is due
+        # and posts due reminders to self.alerts, the Tk side shows them (see poll_alerts)
+        self.hasEnded = False
+        self.alerts = queue.Queue()
+        self.scheduler = ReminderScheduler(self.alerts.put)
+        self.agenda = ReminderAgenda()  # sorted upcoming occurrences for the agenda view
+        for reminder in self.manager.snapshot():
+            self.scheduler.add(reminder, self.manager.recurrence(reminder))
+        self.agenda.add_many((reminder, self.manager.recurrence(reminder)) for reminder in self.manager.snapshot())
+        self.scheduler.start()
+        self.alert_job = self.root.after(self.ALERT_POLL_MS, self.poll_alerts)
+        self.destroy_bind = self.root.bind("<Destroy>", self.on_destroy, add="+")
 
     # helpers for form toggles and resets
     def toggle_custom_title(self, event=None):
@@ -199,7 +219,7 @@ class Simple_Reminder_App:
         for var in self.days_vars.values():
             var.set(False)
         self.update_repeat_options()
-        self.edit_index = None
+        self.edit_id = None
         self.save_btn.config(text="Save Reminder")
 
     # save or update reminder method
@@ -250,12 +270,15 @@ class Simple_Reminder_App:
             "triggered": False
         }
 
-        if self.edit_index is None:
+        if self.edit_id is None:
             self.manager.add_reminder(reminder)
             messagebox.showinfo("Success", "Reminder saved successfully!")
         else:
-            self.manager.update_reminder(self.edit_index, reminder)
+            self.manager.update_reminder(self.edit_id, reminder)
             messagebox.showinfo("Success", "Reminder updated successfully!")
+        # same id: replaces the old schedule and agenda entries of an edited reminder
+        self.scheduler.add(reminder, self.manager.recurrence(reminder))
+        self.agenda.add(reminder, self.manager.recurrence(reminder))
 
         self.refresh_list()
         self.clear_form()
@@ -269,7 +292,7 @@ class Simple_Reminder_App:
 
         now = datetime.now()
 
-        for index, r in enumerate(self.manager.reminders):
+        for index, r in enumerate(self.manager.snapshot()):  # row ids are the reminder ids
             # Split datetime into date and time
             date_str, time_str = r['datetime'].split(" ")
 
@@ -283,46 +306,53 @@ class Simple_Reminder_App:
             # Alternate row colors
             tag = "evenrow" if index % 2 == 0 else "oddrow"
 
-            reminder_time = datetime.strptime(r["datetime"], "%Y-%m-%d %H:%M")
-
-            # Mark overdue reminders
-            if r["repeat_type"] == "once" and reminder_time < now:
-                tag = "overdue"
-            elif r["repeat_type"] == "repeat":
-                current_day = now.strftime("%a")
-                if current_day in r.get("days_of_week", []) and reminder_time.time() < now.time():
+            # Mark overdue reminders and show when they are due next (compiled once, see Recurrence)
+            recurrence = self.manager.recurrence(r)
+            next_str = "-"
+            if recurrence is not None:
+                if recurrence.is_overdue(now):
                     tag = "overdue"
+                next_time = recurrence.next_after(now)
+                if next_time is not None:
+                    next_str = next_time.strftime("%a %d %b %H:%M")
 
             # Insert into the Treeview
             self.tree.insert(
                 "",
                 "end",
-                values=(r['title'], date_str, time_str, r['repeat_type'].capitalize(), days),
+                iid=r['id'],
+                values=(r['title'], date_str, time_str, r['repeat_type'].capitalize(), days, next_str),
                 tags=(tag,)
             )
 
 
-    # reminder checker to check where reminders are due
-    def check_reminders(self):
-        """Background thread to check for due reminders."""
+    # due reminders come from the scheduler thread through self.alerts,
+    # all widgets and reminder changes stay on the Tk thread
+    def poll_alerts(self):
+        """Show every reminder that became due since the last check."""
+        if self.hasEnded:
+            return
+        due = []
         while True:
-            now = datetime.now()
-            for reminder in self.manager.reminders:
-                try:
-                    reminder_time = datetime.strptime(reminder["datetime"], "%Y-%m-%d %H:%M")
-                except ValueError:
-                    continue  # skip invalid reminder format
-
-                if reminder["repeat_type"] == "once":
-                    if not reminder["triggered"] and now >= reminder_time:
-                        self.trigger_alert(reminder)
-                        reminder["triggered"] = True
-                        self.manager.save_reminders()
-                else:
-                    current_day = now.strftime("%a")
-                    if current_day in reminder["days_of_week"] and now.strftime("%H:%M") == reminder_time.strftime("%H:%M"):
-                        self.trigger_alert(reminder)
-            time.sleep(60)
+            try:
+                due.append(self.alerts.get_nowait())
+            except queue.Empty:
+                break
+
+        # skip reminders deleted or edited after they were posted
+        due = [reminder for reminder in due if self.manager.get(reminder["id"]) is reminder]
+        if due:
+            # once reminders are marked as triggered, one save for the whole batch
+            once = [reminder for reminder in due if reminder["repeat_type"] == "once"]
+            if once:
+                self.manager.mark_triggered(once)
+            if len(due) <= self.MAX_POPUPS:
+                for reminder in due:
+                    self.trigger_alert(reminder)
+            else:
+                self.trigger_summary_alert(due)
+
+        self.alert_job = self.root.after(self.ALERT_POLL_MS, self.poll_alerts)
 
     # reminder popup functions
     def trigger_alert(self, reminder):
@@ -345,13 +375,64 @@ class Simple_Reminder_App:
         tk.Button(popup, text="OK", bg="#27ae60", fg="white", width=10,
                   command=popup.destroy).pack(pady=10)
 
+    def trigger_summary_alert(self, reminders):
+        """One popup listing many reminders that are due at the same time."""
+        winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+
+        popup = tk.Toplevel(self.root)
+        popup.title("Reminder Alert!")
+        popup.geometry("350x300")
+        popup.attributes('-topmost', True)
+
+        tk.Label(popup, text=f"{len(reminders)} REMINDERS!", font=("Helvetica", 14, "bold"), fg="red").pack(pady=10)
+        listbox = tk.Listbox(popup, font=("Helvetica", 10))
+        listbox.pack(fill="both", expand=True, padx=10)
+        for reminder in reminders:
+            listbox.insert(tk.END, f"{reminder['datetime'].split(' ')[1]}  {reminder['title']}")
+
+        tk.Button(popup, text="OK", bg="#27ae60", fg="white", width=10,
+                  command=popup.destroy).pack(pady=10)
+
+    # agenda window: upcoming occurrences (repeat reminders expanded) in time order
+    AGENDA_RANGES = {"Next 24 hours": 24, "Next 3 days": 72, "Next 7 days": 168, "Next 30 days": 720}
+
+    def open_agenda(self):
+        """Show what fires in the chosen time range."""
+        window = tk.Toplevel(self.root)
+        window.title("Agenda")
+        window.geometry("500x400")
+
+        top = tk.Frame(window)
+        top.pack(fill="x", padx=10, pady=10)
+        tk.Label(top, text="Show:").pack(side="left")
+        range_combo = ttk.Combobox(top, values=list(self.AGENDA_RANGES), state="readonly")
+        range_combo.pack(side="left", padx=5)
+        range_combo.set("Next 7 days")
+
+        columns = ("When", "Title", "Repeat")
+        tree = ttk.Treeview(window, columns=columns, show="headings", style="Treeview")
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=150, anchor="center", stretch=True)
+        tree.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        def show(event=None):
+            tree.delete(*tree.get_children())
+            hours = self.AGENDA_RANGES[range_combo.get()]
+            for when, reminder in self.agenda.upcoming(datetime.now(), timedelta(hours=hours)):
+                tree.insert("", "end", values=(when.strftime("%a %Y-%m-%d %H:%M"), reminder['title'],
+                                               reminder['repeat_type'].capitalize()))
+
+        range_combo.bind("<<ComboboxSelected>>", show)
+        tk.Button(top, text="Refresh", bg="#95a5a6", fg="white", command=show).pack(side="left", padx=5)
+        show()
+
     # edit , delete, clear  reminder methods
     def edit_reminder(self):
         """Load a reminder into the form for editing."""
         try:
-            selected_item = self.tree.selection()[0]
-            index = self.tree.index(selected_item)
-            reminder = self.manager.reminders[index]
+            reminder_id = self.tree.selection()[0]
+            reminder = self.manager.get(reminder_id)
 
             # Populate form fields
             if reminder['title'] in self.reminder_types:
@@ -376,7 +457,7 @@ class Simple_Reminder_App:
             for day, var in self.days_vars.items():
                 var.set(day in reminder.get('days_of_week', []))
 
-            self.edit_index = index
+            self.edit_id = reminder_id
             self.save_btn.config(text="Update Reminder")
 
         except IndexError:
@@ -385,11 +466,13 @@ class Simple_Reminder_App:
     def delete_reminder(self):
         """Delete a single reminder after confirmation."""
         try:
-            selected_item = self.tree.selection()[0]
-            index = self.tree.index(selected_item)
+            reminder_id = self.tree.selection()[0]
+            reminder = self.manager.get(reminder_id)
 
             if messagebox.askyesno("Confirm", "Are you sure you want to delete this reminder?"):
-                self.manager.remove_reminder(index)
+                self.scheduler.remove(reminder)
+                self.agenda.remove(reminder)
+                self.manager.remove_reminder(reminder_id)
                 self.refresh_list()
         except IndexError:
             messagebox.showwarning("Selection Error", "No reminder selected!")
@@ -398,10 +481,21 @@ class Simple_Reminder_App:
         """Delete all reminders after confirmation."""
         if messagebox.askyesno("Confirm", "Are you sure you want to clear all reminders?"):
             self.manager.clear_reminders()
+            self.scheduler.clear()
+            self.agenda.clear()
             self.refresh_list()
-            
+
+    def on_destroy(self, event):
+        """Stop the scheduler when the window is closed."""
+        if event.widget is self.root:
+            self.hasEnded = True
+            self.scheduler.stop()
+
     def return_to_main(self):
         self.hasEnded = True
+        self.scheduler.stop()
+        self.root.after_cancel(self.alert_job)
+        self.root.unbind("<Destroy>", self.destroy_bind) # the root outlives this screen
         for widget in self.root.winfo_children():
             widget.destroy()
 
@@ -420,50 +514,373 @@ class StorageManager:
 
 # reminder manager to handle saving and loading reminders
 class ReminderManager(StorageManager):
-    """Handles saving, loading, and managing reminders."""
+    """Handles saving, loading, and managing reminders.
+
+    Reminders are kept in a dict by their "id" (a UUID given when they are
+    added). The file holds one JSON line per change: the whole reminder when it
+    is added or changed, {"id": ..., "deleted": true} when it is removed, so a
+    change writes one line. When old lines outnumber the reminders the file is
+    rewritten with only the current ones. A reminders.json from older versions
+    (one JSON list) is converted when it is loaded.
+    """
+
+    COMPACT_AFTER = 100  # old lines always allowed before the file is rewritten
 
     def __init__(self, filename="reminders.json"):
         super().__init__(filename)  # inherit from StorageManager
-        self.reminders = []
+        self.reminders = {}  # id -> reminder, in the order they were added
+        self.lock = threading.RLock()  # every change and save holds it, other threads may read
+        self.recurrences = {}  # id -> (reminder, its Recurrence), filled on first use
+        self.dead_lines = 0
 
     def load_reminders(self):
-        """Load reminders from a JSON file if it exists."""
+        """Load reminders from the JSON file if it exists."""
         try:
-            if os.path.exists(self.filename):
+            with self.lock:
+                self.reminders = {}
+                self.recurrences = {}
+                self.dead_lines = 0
+                if not os.path.exists(self.filename):
+                    return
                 with open(self.filename, "r") as file:
-                    self.reminders = json.load(file)
-            else:
-                self.reminders = []
+                    text = file.read()
+
+                if text.lstrip().startswith("["):  # old format: the whole list as one JSON document
+                    for reminder in json.loads(text):
+                        reminder.setdefault("id", uuid.uuid4().hex)
+                        self.reminders[reminder["id"]] = reminder
+                    self.save_reminders()
+                    return
+
+                for line in text.splitlines():
+                    try:
+                        entry = json.loads(line)
+                        reminder_id = entry["id"]
+                    except (ValueError, KeyError, TypeError):
+                        self.dead_lines += 1  # e.g. half-written last line after a crash
+                        continue
+                    if self.reminders.pop(reminder_id, None) is not None:
+                        self.dead_lines += 1
+                    if entry.get("deleted"):
+                        self.dead_lines += 1
+                    else:
+                        self.reminders[reminder_id] = entry
+                if text and not text.endswith("\n"):
+                    self.save_reminders()  # so the next change starts on a new line
+                else:
+                    self.compact()
         except (json.JSONDecodeError, OSError) as e:
             messagebox.showerror("File Error", f"Failed to load reminders: {e}")
-            self.reminders = []
+            self.reminders = {}
+
+    def get(self, reminder_id):
+        return self.reminders.get(reminder_id)
+
+    def recurrence(self, reminder):
+        """Compiled schedule of a reminder, None if its date is not valid."""
+        with self.lock:
+            cached = self.recurrences.get(reminder["id"])
+            if cached is None or cached[0] is not reminder:
+                try:
+                    cached = (reminder, Recurrence(reminder))
+                except (KeyError, ValueError):
+                    cached = (reminder, None)
+                self.recurrences[reminder["id"]] = cached
+            return cached[1]
+
+    def snapshot(self):
+        """Copy of the reminder list, safe to loop over while it changes."""
+        with self.lock:
+            return list(self.reminders.values())
 
     def save_reminders(self):
-        """Save reminders to a JSON file."""
+        """Rewrite the file with only the current reminders (temp file, then swapped in)."""
         try:
-            with open(self.filename, "w") as file:
-                json.dump(self.reminders, file, indent=4)
+            with self.lock:
+                with open(self.filename + ".tmp", "w") as file:
+                    file.write("".join(json.dumps(reminder) + "\n" for reminder in self.reminders.values()))
+                os.replace(self.filename + ".tmp", self.filename)
+                self.dead_lines = 0
         except OSError as e:
             messagebox.showerror("File Error", f"Failed to save reminders: {e}")
 
-    def add_reminder(self, reminder):
-        """Add a new reminder and save it."""
-        self.reminders.append(reminder)
-        self.save_reminders()
+    def compact(self):
+        """Rewrite the file once old lines outnumber the reminders."""
+        if self.dead_lines > max(self.COMPACT_AFTER, len(self.reminders)):
+            self.save_reminders()
 
-    def update_reminder(self, index, reminder):
-        """Update an existing reminder and save changes."""
-        self.reminders[index] = reminder
-        self.save_reminders()
+    def append(self, entries):
+        """Write one line per changed reminder at the end of the file."""
+        try:
+            with self.lock:
+                with open(self.filename, "a") as file:
+                    file.write("".join(json.dumps(entry) + "\n" for entry in entries))
+                self.compact()
+        except OSError as e:
+            messagebox.showerror("File Error", f"Failed to save reminders: {e}")
 
-    def remove_reminder(self, index):
-        """Remove a reminder by index."""
-        del self.reminders[index]
-        self.save_reminders()
+    def add_reminder(self, reminder):
+        """Add a new reminder with a new id and save it."""
+        with self.lock:
+            reminder["id"] = uuid.uuid4().hex
+            self.reminders[reminder["id"]] = reminder
+            self.append([reminder])
+
+    def update_reminder(self, reminder_id, reminder):
+        """Replace the reminder with this id and save it."""
+        with self.lock:
+            reminder["id"] = reminder_id
+            self.recurrences.pop(reminder_id, None)
+            self.reminders[reminder_id] = reminder
+            self.dead_lines += 1
+            self.append([reminder])
+
+    def remove_reminder(self, reminder_id):
+        """Remove the reminder with this id."""
+        with self.lock:
+            self.recurrences.pop(reminder_id, None)
+            if self.reminders.pop(reminder_id, None) is not None:
+                self.dead_lines += 2  # its line and the delete line
+                self.append([{"id": reminder_id, "deleted": True}])
+
+    def mark_triggered(self, reminders):
+        """Mark once reminders as triggered and save them all together."""
+        with self.lock:
+            for reminder in reminders:
+                reminder["triggered"] = True
+            self.dead_lines += len(reminders)
+            self.append(reminders)
 
     def clear_reminders(self):
         """Clear all reminders."""
-        self.reminders = []
-        self.save_reminders()
-        
-  
\ No newline at end of file
+        with self.lock:
+            self.reminders = {}
+            self.recurrences = {}
+            self.save_reminders()
+
+
+# when a reminder is due, worked out from its saved fields once
+class Recurrence:
+    """Schedule of one reminder as numbers, so checks need no parsing or string formatting.
+
+    A once reminder is due at self.at. A repeat reminder is due at minute
+    self.minute of the day on every weekday whose bit is set in self.days
+    (bit 0 = Monday, like datetime.weekday()).
+    """
+
+    __slots__ = ("once", "at", "minute", "days")
+    DAY_BITS = {"Mon": 1, "Tue": 2, "Wed": 4, "Thu": 8, "Fri": 16, "Sat": 32, "Sun": 64}
+
+    def __init__(self, reminder):
+        self.at = datetime.strptime(reminder["datetime"], "%Y-%m-%d %H:%M")
+        self.once = reminder["repeat_type"] == "once"
+        self.minute = self.at.hour * 60 + self.at.minute
+        self.days = 0
+        for day in reminder.get("days_of_week") or []:
+            self.days |= self.DAY_BITS.get(day, 0)
+
+    def next_after(self, t):
+        """First time the reminder is due at or after datetime t, None if never."""
+        if self.once:
+            return self.at if self.at >= t else None
+        if not self.days:
+            return None
+        midnight = t.replace(hour=0, minute=0, second=0, microsecond=0)
+        # today counts only if its time has not passed yet
+        offset = 0 if (t - midnight) <= timedelta(minutes=self.minute) else 1
+        weekday = t.weekday()
+        while not self.days >> ((weekday + offset) % 7) & 1:
+            offset += 1
+        return midnight + timedelta(days=offset, minutes=self.minute)
+
+    def occurrences(self, start, end):
+        """Every time the reminder is due in [start, end), in order."""
+        if self.once:
+            if start <= self.at < end:
+                yield self.at
+            return
+        occurrence = self.next_after(start)
+        while occurrence is not None and occurrence < end:
+            yield occurrence
+            occurrence = self.next_after(occurrence + timedelta(minutes=1))
+
+    def is_overdue(self, now):
+        """Once: its time has passed. Repeat: it was due earlier today."""
+        if self.once:
+            return self.at < now
+        return bool(self.days >> now.weekday() & 1) and self.minute < now.hour * 60 + now.minute
+
+
+# agenda: what fires in the next hours or days
+class ReminderAgenda:
+    """Sorted index of upcoming occurrences, repeat reminders expanded.
+
+    Occurrences from self.start up to self.end are kept in one sorted list of
+    (timestamp, sequence, reminder), so a query is a bisect plus the rows it
+    returns. Adding or removing a reminder only inserts or deletes its own
+    occurrences. A query past self.end rebuilds the index over a longer range.
+    """
+
+    HORIZON = timedelta(days=31)
+
+    def __init__(self):
+        self.start = datetime.now().replace(second=0, microsecond=0)
+        self.end = self.start + self.HORIZON
+        self.index = []  # (timestamp, sequence, reminder), sorted
+        self.keys = {}  # reminder id -> (reminder, recurrence, its keys in self.index)
+        self.counter = itertools.count()
+
+    def add(self, reminder, recurrence):
+        self.remove(reminder)
+        for key in self._expand(reminder, recurrence):
+            bisect.insort(self.index, key)
+
+    def add_many(self, pairs):
+        """Add (reminder, recurrence) pairs with one sort instead of an insert per occurrence."""
+        for reminder, recurrence in pairs:
+            self.remove(reminder)
+            self.index.extend(self._expand(reminder, recurrence))
+        self.index.sort()
+
+    def _expand(self, reminder, recurrence):
+        keys = []
+        if recurrence is not None and not (recurrence.once and reminder["triggered"]):
+            for occurrence in recurrence.occurrences(self.start, self.end):
+                keys.append((occurrence.timestamp(), next(self.counter), reminder))
+        self.keys[reminder["id"]] = (reminder, recurrence, keys)
+        return keys
+
+    def remove(self, reminder):
+        _, _, keys = self.keys.pop(reminder["id"], (None, None, []))
+        for key in keys:
+            del self.index[bisect.bisect_left(self.index, key)]
+
+    def clear(self):
+        self.index = []
+        self.keys = {}
+
+    def upcoming(self, now, within):
+        """[(datetime, reminder)] of everything due from now until now + within."""
+        if now + within > self.end or now < self.start:
+            self.rebuild(now, within)
+        low = bisect.bisect_left(self.index, (now.timestamp(),))
+        high = bisect.bisect_left(self.index, ((now + within).timestamp(),))
+        return [(datetime.fromtimestamp(timestamp), reminder) for timestamp, _, reminder in self.index[low:high]]
+
+    def rebuild(self, now, within):
+        reminders = list(self.keys.values())
+        self.start = now.replace(second=0, microsecond=0)
+        self.end = self.start + max(self.HORIZON, within + timedelta(minutes=1))
+        self.clear()
+        self.add_many((reminder, recurrence) for reminder, recurrence, _ in reminders)
+
+
+# scheduler that fires reminders at their time
+class ReminderScheduler:
+    """Keeps the next fire time of every reminder in a min-heap.
+
+    A worker thread sleeps on a condition variable until the earliest fire
+    time and wakes early when reminders are added, removed or changed.
+    Removing a reminder only marks its heap entry as cancelled (it is dropped
+    when it reaches the top), so add and remove are O(log n).
+    """
+
+    MAX_SLEEP = 300  # seconds, wake up now and then in case the system clock was changed
+
+    def __init__(self, fire):
+        self.fire = fire  # fire(reminder), called on the scheduler thread
+        self.heap = []  # [fire timestamp, sequence, reminder, cancelled, recurrence]
+        self.entries = {}  # reminder id -> its heap entry
+        self.counter = itertools.count()  # breaks ties so reminders are never compared
+        self.condition = threading.Condition()
+        self.running = False
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def add(self, reminder, recurrence):
+        """Schedule the next occurrence of a reminder (nothing if it has none).
+
+        An entry already scheduled for the same reminder id is cancelled either way.
+        """
+        fire_time = self.next_fire_time(reminder, recurrence, datetime.now())
+        if fire_time is None:
+            self.remove(reminder)  # e.g. edited to a date that has passed
+            return
+        with self.condition:
+            self._push(reminder, recurrence, fire_time)
+            if self.heap[0][2] is reminder:
+                self.condition.notify()  # earlier than what the thread is waiting for
+
+    def remove(self, reminder):
+        with self.condition:
+            entry = self.entries.pop(reminder["id"], None)
+            if entry is not None:
+                entry[3] = True
+
+    def clear(self):
+        with self.condition:
+            self.heap = []
+            self.entries = {}
+            self.condition.notify()
+
+    def _push(self, reminder, recurrence, fire_time):
+        entry = [fire_time, next(self.counter), reminder, False, recurrence]
+        old = self.entries.get(reminder["id"])
+        if old is not None:
+            old[3] = True
+        self.entries[reminder["id"]] = entry
+        heapq.heappush(self.heap, entry)
+
+    @staticmethod
+    def next_fire_time(reminder, recurrence, now):
+        """Timestamp of the next time the reminder is due, None if never again.
+
+        A once reminder that is not triggered yet is due at its time (right away if
+        that has passed). A repeat reminder is due at its time on its next selected
+        day, counting an occurrence earlier in the current minute as still due.
+        """
+        if recurrence is None:
+            return None  # skip invalid reminder format
+        if recurrence.once:
+            return None if reminder["triggered"] else recurrence.at.timestamp()
+        occurrence = recurrence.next_after(now.replace(second=0, microsecond=0))
+        return None if occurrence is None else occurrence.timestamp()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running:
+                    while self.heap and self.heap[0][3]:
+                        heapq.heappop(self.heap)  # cancelled entries
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+                    delay = self.heap[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    self.condition.wait(min(delay, self.MAX_SLEEP))
+                if not self.running:
+                    return
+
+                entry = heapq.heappop(self.heap)
+                reminder, recurrence = entry[2], entry[4]
+
+            self.fire(reminder)
+
+            # a repeat reminder goes back in the heap for its next day
+            fire_time = None
+            if not recurrence.once:
+                fire_time = self.next_fire_time(reminder, recurrence, datetime.now() + timedelta(minutes=1))
+            with self.condition:
+                if self.entries.get(reminder["id"]) is entry:  # not removed or changed while it fired
+                    if fire_time is None:
+                        del self.entries[reminder["id"]]
+                    else:
+                        self._push(reminder, recurrence, fire_time)
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from Expenses_Tracker import ExpenseImporter
+
+
+class ExpenseImporterSignTest(unittest.TestCase):
+    """One credit row and one debit row, read with both sign conventions."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as f:
+            f.write("date,category,remarks,amount\n")
+            f.write("2024-05-01,Others,Salary,+3000.00\n")
+            f.write("2024-05-02,Food,Lunch,-12.50\n")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def read(self, expense_sign):
+        importer = ExpenseImporter(self.path, expense_sign)
+        importer._run()  # on this thread, the window would use start()
+        return importer.messages.get_nowait()
+
+    def test_bank_export_skips_credits(self):
+        status, expenses, skipped = self.read(-1)
+        self.assertEqual(status, "done")
+        self.assertEqual([(e["remarks"], e["amount"]) for e in expenses], [("Lunch", 12.5)])
+        self.assertEqual(skipped, 1)
+
+    def test_expense_list_skips_negative_rows(self):
+        status, expenses, skipped = self.read(1)
+        self.assertEqual(status, "done")
+        self.assertEqual([(e["remarks"], e["amount"]) for e in expenses], [("Salary", 3000.0)])
+        self.assertEqual(skipped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()